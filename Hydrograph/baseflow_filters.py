@@ -0,0 +1,114 @@
+# -*- coding: utf-8 -*-
+
+#-Authorship information-########################################################################################################################
+__author__ = 'Wilco Terink'
+__copyright__ = 'Wilco Terink'
+__version__ = '1.0.1'
+__email__ = 'wilco.terink@ecan.govt.nz'
+__date__ ='December 2019'
+#################################################################################################################################################
+
+import numpy as np
+from scipy.signal import lfilter, lfiltic
+
+#-Time-step (in minutes) for which the filter parameters are defined
+DAY = 1440.
+
+def segments(Q):
+    '''
+    Returns a list with (start, end) of the consecutive records in numpy array Q that are not NaN.
+    '''
+    valid = np.concatenate([[False], ~np.isnan(Q), [False]])
+    edges = np.flatnonzero(np.diff(valid.astype(np.int8)))
+    return list(zip(edges[::2], edges[1::2]))
+
+def stepAlpha(alpha, dt):
+    '''
+    Returns the filter parameter for a dt-minute time-step, for filter parameter alpha of a daily time-step. The parameter is the fraction
+    that remains after one time-step, so it is scaled as alpha ** (dt / 1440); e.g. 0.98 for daily data is 0.99979 for 15-minute data.
+    '''
+    return alpha ** (dt / DAY)
+
+def lyneHollickPass(Q, alpha):
+    '''
+    Single (forward) pass of the Lyne and Hollick (1979) filter over numpy array Q without NaNs. The quickflow is calculated by
+    qf[t] = alpha * qf[t-1] + (1 + alpha) / 2 * (Q[t] - Q[t-1]), with qf = 0 at the first record. Returns the baseflow Q - qf,
+    constrained between 0 and Q.
+    '''
+    #-subtracting Q[0] sets the flow before the first record equal to Q[0], so qf starts at 0
+    qf = lfilter([(1 + alpha) / 2, -(1 + alpha) / 2], [1, -alpha], Q - Q[0])
+    return np.clip(Q - qf, 0, Q)
+
+def lyneHollick(Q, alpha=0.925, passes=3, dt=DAY):
+    '''
+    Baseflow separation using the recursive digital filter of Lyne and Hollick (1979), applied in alternating forward and backward passes
+    (Nathan and McMahon 1990). Each pass is a linear filter (scipy.signal.lfilter), so the computation time increases linearly with the
+    length of the series. The constraint that baseflow lies between 0 and the flow is applied after each pass, rather than at each
+    time-step. Consecutive records that are not NaN are filtered separately.
+    ------------------------------------------------------------------------------------------------------------------------------------
+    Input:
+        Q:         Numpy array with flow in cumecs at a constant time-step.
+        alpha:     Filter parameter for daily data, which is scaled to time-step dt (see 'stepAlpha'). Default is 0.925 (Nathan and McMahon
+                   1990).
+        passes:    Number of passes (forward, backward, forward, ...). Default is 3.
+        dt:        Time-step of Q in minutes. Default is 1440 (daily data).
+    ------------------------------------------------------------------------------------------------------------------------------------
+    Returns:
+        QB:        Numpy array with baseflow in cumecs (NaN where Q is NaN).
+    '''
+    alpha = stepAlpha(alpha, dt)
+    Q = np.asarray(Q, dtype=np.float64)
+    QB = np.full(Q.shape, np.nan)
+    for s, e in segments(Q):
+        b = Q[s:e]
+        for p in range(passes):
+            if p % 2 == 0:
+                b = lyneHollickPass(b, alpha)
+            else:
+                b = lyneHollickPass(b[::-1], alpha)[::-1]
+        QB[s:e] = b
+    return QB
+
+def eckhardtPass(Q, alpha, bfi_max):
+    '''
+    Single (forward) pass of the Eckhardt (2005) filter over numpy array Q without NaNs. The baseflow is calculated by
+    b[t] = ((1 - bfi_max) * alpha * b[t-1] + (1 - alpha) * bfi_max * Q[t]) / (1 - alpha * bfi_max), with b = Q at the first record.
+    Returns the baseflow constrained to not exceed Q.
+    '''
+    c = 1 - alpha * bfi_max
+    num = [(1 - alpha) * bfi_max / c]
+    den = [1, -(1 - bfi_max) * alpha / c]
+    b = np.empty_like(Q)
+    b[0] = Q[0]
+    b[1:] = lfilter(num, den, Q[1:], zi=lfiltic(num, den, [Q[0]]))[0]
+    return np.minimum(b, Q)
+
+def eckhardt(Q, alpha=0.98, bfi_max=0.8, passes=1, dt=DAY):
+    '''
+    Baseflow separation using the two-parameter recursive digital filter of Eckhardt (2005). With more than one pass, the filter is applied
+    in alternating forward and backward passes. Each pass is a linear filter (scipy.signal.lfilter), so the computation time increases
+    linearly with the length of the series. The constraint that baseflow does not exceed the flow is applied after each pass, rather than
+    at each time-step. Consecutive records that are not NaN are filtered separately.
+    ------------------------------------------------------------------------------------------------------------------------------------
+    Input:
+        Q:         Numpy array with flow in cumecs at a constant time-step.
+        alpha:     Recession constant for daily data, which is scaled to time-step dt (see 'stepAlpha'). Default is 0.98 (Eckhardt 2005).
+        bfi_max:   Maximum value of the baseflow index. Default is 0.8 (perennial streams with porous aquifers; Eckhardt 2005).
+        passes:    Number of passes (forward, backward, forward, ...). Default is 1.
+        dt:        Time-step of Q in minutes. Default is 1440 (daily data).
+    ------------------------------------------------------------------------------------------------------------------------------------
+    Returns:
+        QB:        Numpy array with baseflow in cumecs (NaN where Q is NaN).
+    '''
+    alpha = stepAlpha(alpha, dt)
+    Q = np.asarray(Q, dtype=np.float64)
+    QB = np.full(Q.shape, np.nan)
+    for s, e in segments(Q):
+        b = Q[s:e]
+        for p in range(passes):
+            if p % 2 == 0:
+                b = eckhardtPass(b, alpha, bfi_max)
+            else:
+                b = eckhardtPass(b[::-1], alpha, bfi_max)[::-1]
+        QB[s:e] = b
+    return QB
@@ -0,0 +1,212 @@
+# -*- coding: utf-8 -*-
+
+#-Authorship information-########################################################################################################################
+__author__ = 'Wilco Terink'
+__copyright__ = 'Wilco Terink'
+__version__ = '1.0.1'
+__email__ = 'wilco.terink@ecan.govt.nz'
+__date__ ='December 2019'
+#################################################################################################################################################
+
+import pandas as pd
+import numpy as np
+
+def siteValues(v, sites):
+    '''
+    Returns a numpy array with a value for each site. v can be a scalar, an array-like with a value for each site (in the order of sites),
+    or a dictionary / pandas series with the site name as key.
+    '''
+    if isinstance(v, dict):
+        v = pd.Series(v)
+    if isinstance(v, pd.Series):
+        v = v.reindex(sites)
+        if v.isna().any():
+            raise ValueError('No value given for site(s): %s' %', '.join(str(s) for s in v.index[v.isna()]))
+        return v.to_numpy(dtype=np.float64)
+    return np.broadcast_to(np.asarray(v, dtype=np.float64), (len(sites),)).copy()
+
+def separateBatch(Q, dt, A, k):
+    '''
+    Hewlett and Hibbert baseflow separation of a 2-D array with flows (timesteps x sites). The rising-limb/recession state machine of
+    'sepBaseflow' is run over the timesteps, with each step vectorized over all sites.
+    ------------------------------------------------------------------------------------------------------------------------------------
+    Input:
+        Q:     Numpy array (timesteps x sites) with (interpolated) flow in cumecs.
+        dt:    Numpy array with the time difference in hours between two records.
+        A:     Numpy array with the catchment area in km^2 for each site.
+        k:     Numpy array with the slope of the dividing line for each site.
+    ------------------------------------------------------------------------------------------------------------------------------------
+    Returns:
+        QB:    Numpy array (timesteps x sites) with baseflow in cumecs.
+    '''
+    n, S = Q.shape
+    QB = np.empty_like(Q)
+    if n == 0:
+        return QB
+    kA = k * A
+    flag = np.ones(S, dtype=bool)     #-flag to define new baseflow threshold
+    Qthresh = np.full(S, np.nan)      #-NaN means no threshold
+    t = np.zeros(S)
+    #-For first record, baseflow equals total runoff
+    QB[0] = Q[0]
+    with np.errstate(invalid='ignore'):
+        for i in range(1, n):
+            Qtot = Q[i]
+            #-Check whether increase in streamflow between two time-steps is larger than k * dt * A, and thus indicates the start of the
+            #-rising limb
+            start = (Qtot > (Q[i-1] + kA * dt[i])) & flag
+            if start.any():
+                Qthresh = np.where(start, Q[i-1], Qthresh)
+                flag = flag & ~start
+                t = np.where(start, 0., t)
+            #-Linearly calculate baseflow using time difference and threshold (a threshold of 0 is treated as no threshold, as in
+            #-sepBaseflow)
+            active = ~np.isnan(Qthresh) & (Qthresh != 0)
+            t = np.where(active, t + dt[i], t)
+            QBase = np.where(active, Qthresh + kA * t, Qtot)
+            #-Check if recession limb is below the baseflow curve
+            below = QBase > Qtot
+            if below.any():
+                Qthresh = np.where(below, np.nan, Qthresh)
+                flag = flag | below
+            #-Make sure baseflow does not exceed total runoff at any point in time
+            QB[i] = np.where(Qtot < QBase, Qtot, QBase)
+    return QB
+
+def filterpeaksBatch(P, dt, tp_min=None):
+    '''
+    Assigns peak numbers to a 2-D array with peakflows (timesteps x sites), following the rules of 'filterpeaks' for each site
+    (column). Each step is vectorized over all sites.
+    ------------------------------------------------------------------------------------------------------------------------------------
+    Input:
+        P:         Numpy array (timesteps x sites) with peakflow in cumecs.
+        dt:        Numpy array with the time difference in hours between two records.
+        tp_min:    Minimum duration of runoff peak in hours to be selected as being a peak.
+    ------------------------------------------------------------------------------------------------------------------------------------
+    Returns:
+        L:         Numpy array (timesteps x sites) with the peak nr. of each record (NaN if not part of a peak).
+        P:         Numpy array (timesteps x sites) with peakflow, set to NaN for the records of peaks that have been removed because they
+                   contained more than one missing record.
+    '''
+    n, S = P.shape
+    P = P.copy()
+    L = np.full((n, S), np.nan)
+    marker = np.isnan(P)
+    pcnt = np.zeros(S)
+    old = np.zeros(S)
+    nan_count = np.zeros(S, dtype=np.int64)   #-nr. of missing records with the current peak nr.
+    starts = [[0] for s in range(S)]          #-record at which each peak nr. was started (for each site)
+    with np.errstate(invalid='ignore'):
+        for i in range(n):
+            pf = P[i]
+            inc = (pf > 0.) & (old == 0.)
+            if inc.any():
+                pcnt = pcnt + inc
+                old = np.where(inc, pf, old)
+                nan_count[inc] = 0
+                for s in np.flatnonzero(inc):
+                    starts[s].append(i)
+            isn = marker[i]
+            zero = pf == 0.
+            L[i] = np.where(zero, np.nan, pcnt)
+            nan_count += isn
+            old = np.where(isn, np.nan, old)
+            old = np.where(zero, 0., old)
+            #-An event has ended; remove the peak if it contains more than one missing record
+            for s in np.flatnonzero(zero & (nan_count > 1)):
+                p = pcnt[s]
+                i0 = starts[s][-1] if len(starts[s]) > 1 else 0
+                rows = np.flatnonzero(L[i0:i, s] == p) + i0
+                L[rows, s] = np.nan
+                P[rows, s] = np.nan
+                marker[rows, s] = False
+                if len(starts[s]) > 1:
+                    starts[s].pop()
+                pcnt[s] = p - 1
+                i0 = starts[s][-1] if len(starts[s]) > 1 else 0
+                nan_count[s] = np.count_nonzero(marker[i0:i, s] & (L[i0:i, s] == p - 1))
+
+    #-Select for minimum duration to make it classify as a peak
+    if tp_min:
+        sel = ~np.isnan(L)
+        lmin = int(np.nanmin(L)) if sel.any() else 0
+        nmax = int(np.nanmax(L)) - lmin + 1 if sel.any() else 1
+        site = np.broadcast_to(np.arange(S), (n, S))
+        key = site[sel] * nmax + (L[sel] - lmin).astype(np.int64)
+        duration = np.bincount(key, weights=np.broadcast_to(dt[:, None], (n, S))[sel], minlength=S * nmax)
+        short = np.zeros((n, S), dtype=bool)
+        short[sel] = duration[key] < tp_min
+        L[short] = np.nan
+    return L, P
+
+def sepBaseflowBatch(x, dt, A, k=0.000546, dt_max=None, tp_min=None):
+    '''
+    Separate the time-series of multiple sites that share the same time grid into baseflow and peakflow in one call. Produces the same
+    results as calling 'sepBaseflow' for each site (within floating-point rounding), but the date range, time differences and
+    interpolation are calculated once for all sites, and the separation and peak filtering are vectorized over the sites.
+
+    ------------------------------------------------------------------------------------------------------------------------------------
+    Input:
+        x:          Pandas dataframe with Index being a pandas datetime index and 'Date' label, and one column with flow data (cumecs)
+                    for each site. The column names are used as site names.
+        dt:         Minimum time-step interval (in minutes) for analysing the data. Minute choices are 5, 15, or 60.
+        A:          Catchment area in km^2 upstream of point of interest: a scalar, an array with a value for each column of x, or a
+                    dictionary / pandas series with the site name as key.
+        k:          Slope of the dividing line (see 'sepBaseflow'): a scalar, an array with a value for each column of x, or a dictionary /
+                    pandas series with the site name as key. Default is 0.000546  m^3 s^-1 km^-2 h^-1 (Hewlett and Hibbert 1967).
+        dt_max:     Only interpolate over maximum number of consecutive NaN defined over time period dt_max in hours.
+        tp_min:     Minimum duration of runoff peak in hours to be selected as being a peak.
+    ------------------------------------------------------------------------------------------------------------------------------------
+    Returns:
+        df_final:   Pandas dataframe with the results of all sites stacked, with a ('Site', 'Date') multi-index and the same columns as
+                    the output of 'sepBaseflow'. The results of a single site are selected with df_final.xs(site, level='Site').
+    '''
+    sites = list(x.columns)
+    A = siteValues(A, sites)
+    k = siteValues(k, sites)
+
+    #-date range for full period (set it depending on the defined time interval)
+    freq = {5: '5T', 15: '15T'}.get(dt, '60T')
+    dr = pd.date_range(x.index.min(), x.index.max(), freq=freq, name='Date')
+    steps = {5: 12, 15: 4}.get(dt, 1)
+    dth = pd.Series(dr).diff().dt.seconds.fillna(0).to_numpy() / 3600.0
+
+    Qraw = x.reindex(dr); x = None
+    #-only interpolate maximum number of consecutive NaNs
+    if dt_max:
+        Qint = Qraw.interpolate(method='time', limit=dt_max*steps)
+    else:
+        Qint = Qraw.interpolate(method='time')
+    Qraw = Qraw.to_numpy(dtype=np.float64)
+    Qint = Qint.to_numpy(dtype=np.float64)
+
+    QB = separateBatch(Qint, dth, A, k)
+    QB = np.fmin(QB, Qraw)
+    L, P = filterpeaksBatch(Qint - QB, dth, tp_min)
+
+    #-Stack the sites
+    S = len(sites)
+    n = len(dr)
+    df_final = pd.DataFrame({'Site': np.repeat(np.array(sites, dtype=object), n), 'Date': np.tile(dr.values, S)})
+    df_final['dt [hour]'] = np.tile(dth, S)
+    df_final['Total runoff [m^3 s^-1]'] = Qraw.T.ravel()
+    df_final['Total runoff interp. [m^3 s^-1]'] = Qint.T.ravel()
+    df_final['Baseflow [m^3 s^-1]'] = QB.T.ravel()
+    df_final['Peakflow [m^3 s^-1]'] = P.T.ravel()
+    df_final['Peak nr.'] = L.T.ravel()
+    Qraw = None; Qint = None; QB = None; P = None; L = None
+
+    #-Start and end of peakflow event
+    g = df_final.groupby(['Site', 'Peak nr.'], sort=False)['Date']
+    df_final['Peakflow starts'] = g.transform('min')
+    df_final['Peakflow ends'] = g.transform('max')
+    #-Flow volume
+    df_final['Flow volume [m^3]'] = df_final['Total runoff interp. [m^3 s^-1]'] * 3600 * df_final['dt [hour]']
+    df_final.loc[pd.isna(df_final['Peak nr.']), 'Flow volume [m^3]'] = np.nan
+    #-Max flow and (first) time of max flow
+    df_final['Max. flow [m^3 s^-1]'] = df_final.groupby(['Site', 'Peak nr.'], sort=False)['Total runoff interp. [m^3 s^-1]'].transform('max')
+    df_final['Date max. flow'] = df_final['Date'].where(df_final['Total runoff interp. [m^3 s^-1]'] == df_final['Max. flow [m^3 s^-1]'])
+    df_final['Date max. flow'] = df_final.groupby(['Site', 'Peak nr.'], sort=False)['Date max. flow'].transform('min')
+    df_final['Tp [hour]'] = (df_final['Date max. flow'] - df_final['Peakflow starts']).dt.seconds / 3600
+    df_final.set_index(['Site', 'Date'], inplace=True)
+    return df_final
@@ -0,0 +1,319 @@
+# -*- coding: utf-8 -*-
+
+#-Authorship information-########################################################################################################################
+__author__ = 'Wilco Terink'
+__copyright__ = 'Wilco Terink'
+__version__ = '1.0.1'
+__email__ = 'wilco.terink@ecan.govt.nz'
+__date__ ='December 2019'
+#################################################################################################################################################
+
+#-Only light-weight standard libraries are imported here. Pandas, scipy and matplotlib are imported inside the functions that need them,
+#-so that 'hydrograph --help' and invocations that only run a few stages start up quickly.
+import argparse
+import json
+import os
+import sys
+import time
+
+STAGES = ['separate', 'stats', 'fit', 'report']
+
+def readParams(fname):
+    '''
+    Reads the parameter file (json format) for a batch run. Example of a parameter file:
+
+        {
+            "dt": 15,
+            "A": 1461,
+            "k": 0.000546,
+            "dt_max": 12,
+            "tp_min": 6,
+            "compact": false,
+            "method": "hewlett-hibbert",
+            "qc": {"q_max": 5000, "spike_rate": 0.05, "flat_hours": 24},
+            "Tmax": 100,
+            "dayfirst": true,
+            "sites": {"Rangitata_Klondyke": {"A": 1461}}
+        }
+
+    Parameters under "sites" override the general parameters for the site file with that name (without extension). The optional "qc"
+    parameters are passed to 'Hydrograph.quality.qualityCodes', and the records that fail the checks are removed before separation.
+    --------------------------------------------------------------------------------------------------------------------------------------
+    Input:
+        fname:    Full path to the parameter file.
+    --------------------------------------------------------------------------------------------------------------------------------------
+    Returns:
+        params:   Dictionary with the parameters.
+    '''
+    with open(fname) as f:
+        params = json.load(f)
+    for p in ['dt', 'A']:
+        sites = params.get('sites', {}).values()
+        if p not in params and not (sites and all(p in s for s in sites)):
+            raise ValueError('Parameter "%s" is missing in %s' %(p, fname))
+    return params
+
+def siteFiles(path):
+    '''
+    Returns a sorted list with the site files (*.csv or *.parquet) in directory path, or a list with path itself if path is a file.
+    '''
+    if os.path.isdir(path):
+        return sorted(os.path.join(path, f) for f in os.listdir(path) if f.lower().endswith(('.csv', '.parquet')))
+    return [path]
+
+def siteName(fname):
+    '''
+    Returns the name of the site, being the file name without extension.
+    '''
+    return os.path.splitext(os.path.basename(fname))[0]
+
+def siteParams(params, site):
+    '''
+    Returns the parameters for a site, being the general parameters updated with the site specific ones.
+    '''
+    p = {k: v for k, v in params.items() if k != 'sites'}
+    p.update(params.get('sites', {}).get(site, {}))
+    return p
+
+def readSite(fname, dayfirst=True):
+    '''
+    Reads a site file with the date in the first column and flow in the second column (or the output of 'sepBaseflow' if the separation
+    stage is skipped). Returns a pandas dataframe with datetime index with 'Date' label.
+    '''
+    import pandas as pd
+    if fname.lower().endswith('.parquet'):
+        df = pd.read_parquet(fname)
+        if df.index.name != 'Date':
+            df.set_index(df.columns[0], inplace=True)
+    else:
+        df = pd.read_csv(fname, parse_dates=[0], index_col=0, dayfirst=dayfirst)
+    df.index.name = 'Date'
+    if df.shape[1] == 1:
+        df.columns = ['Total runoff [m^3 s^-1]']
+    return df
+
+def writeTable(df, fname, fmt, index=True):
+    '''
+    Writes dataframe df to fname + '.csv' or fname + '.parquet', depending on fmt.
+    '''
+    if fmt == 'parquet':
+        df.to_parquet(fname + '.parquet', index=index)
+    else:
+        df.to_csv(fname + '.csv', index=index)
+
+def computeSite(df, params, stages, verbose=False):
+    '''
+    Runs the compute stages for a single site.
+    --------------------------------------------------------------------------------------------------------------------------------------
+    Input:
+        df:        Pandas dataframe as returned by 'readSite'.
+        params:    Dictionary with the site parameters.
+        stages:    List with the stages to run (see STAGES).
+        verbose:   If True, the progress messages of 'sepBaseflow' are printed.
+    --------------------------------------------------------------------------------------------------------------------------------------
+    Returns:
+        results:   Dictionary with the results of each stage that has been run ('peaks', 'stats' and 'gev').
+        timings:   Dictionary with the time in seconds spent in each stage.
+    '''
+    import contextlib
+    import io
+    results = {}
+    timings = {}
+
+    if 'separate' in stages:
+        from Hydrograph.hydrograph import sepBaseflow
+        t0 = time.perf_counter()
+        out = sys.stdout if verbose else io.StringIO()
+        qc = None
+        if params.get('qc') is not None:
+            from Hydrograph.quality import qualityCodes
+            qc = qualityCodes(df, params['A'], **params['qc'])
+        with contextlib.redirect_stdout(out):
+            df = sepBaseflow(df, params['dt'], params['A'], params.get('k', 0.000546), params.get('dt_max'), params.get('tp_min'),
+                             compact=params.get('compact', False), method=params.get('method', 'hewlett-hibbert'),
+                             alpha=params.get('alpha'), bfi_max=params.get('bfi_max', 0.8), passes=params.get('passes'),
+                             peak_min=params.get('peak_min', 0.2), qc=qc)
+        results['peaks'] = df
+        timings['separate'] = time.perf_counter() - t0
+    if 'stats' in stages:
+        from Hydrograph.hydrograph import maxFlowVolStats
+        t0 = time.perf_counter()
+        df = maxFlowVolStats(df)
+        results['stats'] = df
+        timings['stats'] = time.perf_counter() - t0
+    if 'fit' in stages or 'report' in stages:
+        import matplotlib
+        matplotlib.use('Agg')
+        from Hydrograph.extreme_analysis import fitGEV
+        t0 = time.perf_counter()
+        if 'stats' not in stages:
+            #-the input is the output of 'maxFlowVolStats'; it is kept for the report, but not written again
+            results['stats'] = df
+        gev = {}
+        for c in ['Flow volume [MCM]', 'Total runoff interp. [m^3 s^-1]']:
+            gev[c] = fitGEV(df[c].sort_values(), params.get('Tmax', 100))
+        results['gev'] = gev
+        timings['fit'] = time.perf_counter() - t0
+    return results, timings
+
+def reportSite(results, params, site, outdir):
+    '''
+    Saves the PDF, CDF and GEV plots of the annual maximum flow volumes and peak flows of a site in outdir.
+    '''
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+    from Hydrograph.extreme_analysis import exceed, plotPDF, plotCDF, plotGEV
+
+    labels = {'Flow volume [MCM]': ('volume', 'Peak flow volume [MCM]'),
+              'Total runoff interp. [m^3 s^-1]': ('peak', 'Peak flow [m$^3$ s$^{-1}$]')}
+    for c, (short, xlabel) in labels.items():
+        x = results['stats'][c].sort_values()
+        gev_fit, gev_inv = results['gev'][c]
+        e, t = exceed(x.to_numpy())
+        plotPDF(x, gev_fit, 10, xlabel, site, os.path.join(outdir, 'PDF_%s_max_%s.png' %(site, short)))
+        plotCDF(x, gev_fit, e, xlabel, site, fname=os.path.join(outdir, 'CDF_%s_max_%s.png' %(site, short)))
+        plotGEV(x, t, gev_inv, params.get('Tmax', 100), xlabel, site, fname=os.path.join(outdir, 'GEV_%s_max_%s.png' %(site, short)))
+        plt.close('all')
+
+def computeReportSite(df, params, stages, verbose, site, outdir):
+    '''
+    Runs the compute stages for a single site (see 'computeSite') and renders the report plots if the 'report' stage is selected. Used by
+    the pipelined runner, so that the plots are rendered in the worker processes instead of in the writer thread.
+    '''
+    results, timings = computeSite(df, params, stages, verbose)
+    if 'report' in stages:
+        t0 = time.perf_counter()
+        reportSite(results, params, site, outdir)
+        timings['report'] = time.perf_counter() - t0
+    return results, timings
+
+def writeSite(results, params, site, outdir, fmt, stages):
+    '''
+    Writes the results of a site to outdir and renders the report plots if the 'report' stage is selected. Returns the time in seconds
+    spent on writing and on the report.
+    '''
+    import pandas as pd
+    timings = {}
+    t0 = time.perf_counter()
+    if 'peaks' in results:
+        writeTable(results['peaks'], os.path.join(outdir, site + '_peaks'), fmt)
+        from Hydrograph.event_index import eventIndex
+        writeTable(eventIndex(results['peaks'], site), os.path.join(outdir, site + '_events'), fmt, index=False)
+    if 'stats' in results and 'stats' in stages:
+        writeTable(results['stats'], os.path.join(outdir, site + '_stats'), fmt, index=False)
+    if 'gev' in results:
+        gev = pd.DataFrame([list(v[0]) for v in results['gev'].values()], index=list(results['gev'].keys()),
+                           columns=['Shape', 'Location', 'Scale'])
+        gev.index.name = 'Variable'
+        writeTable(gev, os.path.join(outdir, site + '_gev'), fmt)
+        #-Lookup table for classifying new events without scipy (see Hydrograph.return_period)
+        from Hydrograph.return_period import returnPeriodTable, saveReturnPeriodTable
+        table = returnPeriodTable(results['gev']['Total runoff interp. [m^3 s^-1]'][0], results['gev']['Flow volume [MCM]'][0])
+        saveReturnPeriodTable(os.path.join(outdir, site + '_return_periods.npz'), table)
+    timings['write'] = time.perf_counter() - t0
+    if 'report' in stages:
+        t0 = time.perf_counter()
+        reportSite(results, params, site, outdir)
+        timings['report'] = time.perf_counter() - t0
+    return timings
+
+def processSite(fname, params, outdir, fmt, stages, verbose=False):
+    '''
+    Reads, computes and writes the results for a single site file. Returns the site name and a dictionary with the time in seconds spent
+    in each stage.
+    '''
+    site = siteName(fname)
+    p = siteParams(params, site)
+    t0 = time.perf_counter()
+    df = readSite(fname, p.get('dayfirst', True))
+    timings = {'read': time.perf_counter() - t0}
+    results, t = computeSite(df, p, stages, verbose); df = None
+    timings.update(t)
+    timings.update(writeSite(results, p, site, outdir, fmt, stages))
+    return site, timings
+
+def printProfile(timings, wall):
+    '''
+    Prints the summed time spent in each stage over all sites, and the wall clock time of the run.
+    '''
+    total = {}
+    for t in timings.values():
+        for stage, sec in t.items():
+            total[stage] = total.get(stage, 0.) + sec
+    print('%-10s %10s' %('Stage', 'Time [s]'), file=sys.stderr)
+    for stage in ['read', 'separate', 'stats', 'fit', 'write', 'report']:
+        if stage in total:
+            print('%-10s %10.3f' %(stage, total[stage]), file=sys.stderr)
+    print('%-10s %10.3f' %('wall', wall), file=sys.stderr)
+
+def parseArgs(argv=None):
+    parser = argparse.ArgumentParser(prog='hydrograph', description='Batch baseflow separation and flood frequency analysis.')
+    parser.add_argument('params', help='Parameter file (json).')
+    parser.add_argument('input', help='Site file (*.csv or *.parquet) or directory with site files.')
+    parser.add_argument('-o', '--output', default='.', help='Output directory (default: current directory).')
+    parser.add_argument('-s', '--stages', default=','.join(STAGES),
+                        help='Comma separated stages to run (default: %s). If "separate" is not selected, the input files should '
+                             'contain the output of sepBaseflow, or the output of maxFlowVolStats if only "fit" and/or "report" are '
+                             'selected.' %','.join(STAGES))
+    parser.add_argument('-w', '--workers', type=int, default=1, help='Number of worker processes (default: 1).')
+    parser.add_argument('-f', '--format', choices=['csv', 'parquet'], default='csv', help='Output table format (default: csv).')
+    parser.add_argument('--profile', action='store_true', help='Print the time spent in each stage.')
+    parser.add_argument('-v', '--verbose', action='store_true', help='Print the progress messages of sepBaseflow.')
+    args = parser.parse_args(argv)
+    args.stages = [s.strip() for s in args.stages.split(',') if s.strip()]
+    for s in args.stages:
+        if s not in STAGES:
+            parser.error('unknown stage "%s" (choose from %s)' %(s, ', '.join(STAGES)))
+    #-The fit and report stages need the annual maxima of the stats stage, or input files with the output of maxFlowVolStats
+    if 'separate' in args.stages and 'stats' not in args.stages:
+        for s in ['fit', 'report']:
+            if s in args.stages:
+                parser.error('stage "%s" needs stage "stats" when "separate" is selected' %s)
+    if args.workers < 1:
+        parser.error('--workers should be at least 1')
+    return args
+
+def main(argv=None):
+    '''
+    Entry point of the 'hydrograph' command.
+    '''
+    args = parseArgs(argv)
+    t0 = time.perf_counter()
+    params = readParams(args.params)
+    files = siteFiles(args.input)
+    os.makedirs(args.output, exist_ok=True)
+
+    timings = {}
+    if args.workers == 1:
+        for f in files:
+            site, timings[site] = processSite(f, params, args.output, args.format, args.stages, args.verbose)
+            print('%s processed.' %site)
+    else:
+        #-Overlap reading and writing of the site files with the computation in the worker processes
+        from Hydrograph.pipeline import runPipeline
+        read_time = {}
+
+        def read(f):
+            t0 = time.perf_counter()
+            site = siteName(f)
+            p = siteParams(params, site)
+            df = readSite(f, p.get('dayfirst', True))
+            read_time[f] = time.perf_counter() - t0
+            return df, p, args.stages, args.verbose, site, args.output
+
+        def write(f, x):
+            results, t = x
+            site = siteName(f)
+            t['read'] = read_time[f]
+            t.update(writeSite(results, siteParams(params, site), site, args.output, args.format, [s for s in args.stages if s != 'report']))
+            timings[site] = t
+            print('%s processed.' %site)
+
+        runPipeline(files, read, computeReportSite, write, args.workers)
+    if args.profile:
+        printProfile(timings, time.perf_counter() - t0)
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,201 @@
+# -*- coding: utf-8 -*-
+
+#-Authorship information-########################################################################################################################
+__author__ = 'Wilco Terink'
+__copyright__ = 'Wilco Terink'
+__version__ = '1.0.1'
+__email__ = 'wilco.terink@ecan.govt.nz'
+__date__ ='December 2019'
+#################################################################################################################################################
+
+#-Index of the peakflow events detected by 'sepBaseflow', for time-window queries without masking the per-timestep output. The index is a
+#-pandas dataframe with one row per event, sorted by site and start of the event. Because the events of a site do not overlap, the starts
+#-and ends of a site are both sorted, and a query only requires binary searches (numpy.searchsorted) on the rows of that site.
+
+import pandas as pd
+import numpy as np
+
+COLUMNS = ['Site', 'Peak nr.', 'Peakflow starts', 'Peakflow ends', 'Date max. flow', 'Max. flow [m^3 s^-1]']
+DATE_COLUMNS = ['Peakflow starts', 'Peakflow ends', 'Date max. flow']
+
+def siteEvents(df, site):
+    '''
+    Returns a dataframe with one row per event of the output of 'sepBaseflow' (df) for a site.
+    '''
+    df = df.loc[pd.notna(df['Peak nr.']), COLUMNS[1:]]
+    df = df.drop_duplicates('Peak nr.')
+    df.insert(0, 'Site', site)
+    return df
+
+def eventIndex(results, site=None):
+    '''
+    Builds an index of the peakflow events in the output of 'sepBaseflow'.
+    ------------------------------------------------------------------------------------------------------------------------------------
+    Input:
+        results:   Output of 'sepBaseflow' for a single site, dictionary with the site name as key and the output of 'sepBaseflow' as
+                   value, or the output of 'sepBaseflowBatch' (with a 'Site' index level).
+        site:      (Optional) Site name used if results is the output for a single site. Default is None.
+    ------------------------------------------------------------------------------------------------------------------------------------
+    Returns:
+        index:     Pandas dataframe with one row per event and the columns 'Site', 'Peak nr.', 'Peakflow starts', 'Peakflow ends',
+                   'Date max. flow' and 'Max. flow [m^3 s^-1]', sorted by site and start of the event.
+    '''
+    if isinstance(results, dict):
+        frames = [siteEvents(df, s) for s, df in results.items()]
+    elif 'Site' in results.index.names:
+        frames = [siteEvents(df, s) for s, df in results.groupby(level='Site', sort=False)]
+    else:
+        frames = [siteEvents(results, site)]
+    index = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=COLUMNS)
+    index = index.sort_values(['Site', 'Peakflow starts'], kind='mergesort', ignore_index=True)
+    for c in DATE_COLUMNS:
+        index[c] = pd.to_datetime(index[c])
+    index['Peak nr.'] = index['Peak nr.'].astype(np.float64)
+    checkOverlap(index)
+    return index
+
+def checkOverlap(index):
+    '''
+    Raises a ValueError if events of the same site in the index overlap.
+    '''
+    sites = index['Site'].to_numpy()
+    starts = index['Peakflow starts'].to_numpy()
+    ends = index['Peakflow ends'].to_numpy()
+    overlap = (sites[1:] == sites[:-1]) & (starts[1:] <= ends[:-1])
+    if overlap.any():
+        raise ValueError('Overlapping events in the event index for site(s): %s' %', '.join(str(s) for s in np.unique(sites[1:][overlap])))
+
+def siteRows(index, site):
+    '''
+    Returns the first and last + 1 row of a site in the index.
+    '''
+    sites = index['Site'].to_numpy()
+    return np.searchsorted(sites, site, 'left'), np.searchsorted(sites, site, 'right')
+
+def siteQueries(index, t, site):
+    '''
+    Generator over the sites in a query. Yields the positions of the queries for a site, the first and last + 1 row of the site in the index,
+    and the starts and ends (numpy datetime64[ns]) of the events of the site. Sites without events are skipped.
+    '''
+    n = len(t)
+    if site is None or np.ndim(site) == 0:
+        groups = [(site, np.arange(n))]
+    else:
+        site = np.asarray(site, dtype=object)
+        groups = [(s, np.flatnonzero(site == s)) for s in pd.unique(site)]
+    starts = index['Peakflow starts'].to_numpy(dtype='M8[ns]')
+    ends = index['Peakflow ends'].to_numpy(dtype='M8[ns]')
+    for s, q in groups:
+        lo, hi = siteRows(index, s) if s is not None else (0, len(index))
+        if hi == lo:
+            continue
+        yield q, lo, hi, starts[lo:hi], ends[lo:hi]
+
+def toDates(t):
+    '''
+    Converts a timestamp or array-like with timestamps to a numpy datetime64[ns] array.
+    '''
+    return pd.to_datetime(np.atleast_1d(t)).to_numpy(dtype='M8[ns]')
+
+def containingEvent(index, t, site=None):
+    '''
+    Finds the event that contains each timestamp in t.
+    ------------------------------------------------------------------------------------------------------------------------------------
+    Input:
+        index:     Event index (see 'eventIndex').
+        t:         Timestamp or array-like with timestamps.
+        site:      Site name, or array-like with the site name for each timestamp. Default is None (index of a single site).
+    ------------------------------------------------------------------------------------------------------------------------------------
+    Returns:
+        rows:      Numpy array with the row in the index of the event containing each timestamp, or -1 if no event contains it. The
+                   events are selected with index.iloc[rows[rows >= 0]].
+    '''
+    t = toDates(t)
+    rows = np.full(len(t), -1, dtype=np.int64)
+    for q, lo, hi, starts, ends in siteQueries(index, t, site):
+        i = np.searchsorted(starts, t[q], 'right') - 1
+        inside = (i >= 0) & (ends[np.maximum(i, 0)] >= t[q])
+        rows[q[inside]] = lo + i[inside]
+    return rows
+
+def overlappingEvents(index, start, end, site=None):
+    '''
+    Finds the events that overlap each time window [start, end].
+    ------------------------------------------------------------------------------------------------------------------------------------
+    Input:
+        index:     Event index (see 'eventIndex').
+        start:     Timestamp or array-like with the start of each window.
+        end:       Timestamp or array-like with the end of each window.
+        site:      Site name, or array-like with the site name for each window. Default is None (index of a single site).
+    ------------------------------------------------------------------------------------------------------------------------------------
+    Returns:
+        query:     Numpy array with the window nr. of each match.
+        rows:      Numpy array with the row in the index of the event of each match. The events overlapping window j are selected with
+                   index.iloc[rows[query == j]].
+    '''
+    start = toDates(start)
+    end = toDates(end)
+    query = [np.zeros(0, dtype=np.int64)]
+    rows = [np.zeros(0, dtype=np.int64)]
+    for q, lo, hi, starts, ends in siteQueries(index, start, site):
+        #-first event that ends at or after the start of the window, and last event that starts before or at the end of the window
+        first = np.searchsorted(ends, start[q], 'left')
+        last = np.searchsorted(starts, end[q], 'right')
+        count = np.maximum(last - first, 0)
+        qq = np.repeat(q, count)
+        rr = np.repeat(first, count) + np.arange(count.sum()) - np.repeat(np.cumsum(count) - count, count)
+        query.append(qq)
+        rows.append(lo + rr)
+    query = np.concatenate(query)
+    rows = np.concatenate(rows)
+    order = np.lexsort((rows, query))
+    return query[order], rows[order]
+
+def nearestEvent(index, t, site=None):
+    '''
+    Finds the event nearest to each timestamp in t. The distance is zero for a timestamp within an event, and otherwise the time to the end
+    of the preceding event or to the start of the next event.
+    ------------------------------------------------------------------------------------------------------------------------------------
+    Input:
+        index:     Event index (see 'eventIndex').
+        t:         Timestamp or array-like with timestamps.
+        site:      Site name, or array-like with the site name for each timestamp. Default is None (index of a single site).
+    ------------------------------------------------------------------------------------------------------------------------------------
+    Returns:
+        rows:      Numpy array with the row in the index of the nearest event, or -1 if the site has no events.
+        distance:  Numpy array with the distance in hours to the nearest event (NaN if the site has no events).
+    '''
+    t = toDates(t)
+    rows = np.full(len(t), -1, dtype=np.int64)
+    distance = np.full(len(t), np.nan)
+    for q, lo, hi, starts, ends in siteQueries(index, t, site):
+        tq = t[q]
+        nxt = np.searchsorted(starts, tq, 'right')
+        prev = nxt - 1
+        d_prev = np.where(prev >= 0, (tq - ends[np.maximum(prev, 0)]) / np.timedelta64(1, 'h'), np.inf)
+        d_prev = np.maximum(d_prev, 0.)
+        d_next = np.where(nxt < hi - lo, (starts[np.minimum(nxt, hi - lo - 1)] - tq) / np.timedelta64(1, 'h'), np.inf)
+        use_prev = d_prev <= d_next
+        rows[q] = lo + np.where(use_prev, prev, nxt)
+        distance[q] = np.where(use_prev, d_prev, d_next)
+    return rows, distance
+
+def saveEventIndex(index, fname):
+    '''
+    Saves an event index to fname in csv format, or in parquet format if fname ends with '.parquet'.
+    '''
+    if fname.endswith('.parquet'):
+        index.to_parquet(fname, index=False)
+    else:
+        index.to_csv(fname, index=False)
+
+def loadEventIndex(fname):
+    '''
+    Loads an event index that was saved with 'saveEventIndex'.
+    '''
+    if fname.endswith('.parquet'):
+        index = pd.read_parquet(fname)
+    else:
+        index = pd.read_csv(fname, parse_dates=DATE_COLUMNS, dtype={'Site': str})
+    index['Site'] = index['Site'].astype(object)
+    return index
@@ -0,0 +1,155 @@
+# -*- coding: utf-8 -*-
+
+#-Authorship information-########################################################################################################################
+__author__ = 'Wilco Terink'
+__copyright__ = 'Wilco Terink'
+__version__ = '1.0.1'
+__email__ = 'wilco.terink@ecan.govt.nz'
+__date__ ='December 2019'
+#################################################################################################################################################
+
+#-Library of normalized event hydrograph shapes, for finding the historical events that are most similar to a (developing) event. The
+#-flow of each event is divided by its maximum flow, and the time since the start of the event by its time to peak, and the result is
+#-sampled at a fixed number of points. The library is a dictionary with numpy arrays, with one row per event.
+
+import pandas as pd
+import numpy as np
+
+def siteShapes(df, site, tau):
+    '''
+    Returns the shapes (events x len(tau)) and the metadata of the events in the output of 'sepBaseflow' (df) for a site. The shapes of all
+    events are sampled with a single call to numpy.interp, by offsetting the normalized time of each event by a multiple of the longest
+    normalized event duration.
+    '''
+    sel = pd.notna(df['Peak nr.']).to_numpy()
+    #-'Peak nr.' is a nullable integer in the compact output of 'sepBaseflow'
+    peak = df['Peak nr.'].to_numpy(dtype=np.float64, na_value=np.nan)[sel]
+    t = df.index.values[sel].astype('M8[ns]').view(np.int64)
+    q = df['Total runoff interp. [m^3 s^-1]'].to_numpy(dtype=np.float64)[sel]
+    start = df['Peakflow starts'].to_numpy(dtype='M8[ns]')[sel].view(np.int64)
+    tmax = df['Date max. flow'].to_numpy(dtype='M8[ns]')[sel].view(np.int64)
+    qmax = df['Max. flow [m^3 s^-1]'].to_numpy(dtype=np.float64)[sel]
+    if len(t) == 0:
+        return np.zeros((0, len(tau)), dtype=np.float32), {'site': np.zeros(0, dtype=str), 'Peak nr.': peak,
+                'Peakflow starts': start.view('M8[ns]'), 'Max. flow [m^3 s^-1]': qmax, 'Tp [hour]': np.zeros(0)}
+    #-first record of each event
+    first = np.flatnonzero(np.concatenate([[True], peak[1:] != peak[:-1]]))
+    event = np.cumsum(np.concatenate([[True], peak[1:] != peak[:-1]])) - 1
+    #-time to peak in hours (at least one time-step, so events that peak at their first record can be normalized)
+    step = np.median(np.diff(df.index.values.astype('M8[ns]').view(np.int64))) / 3.6e12 if len(df) > 1 else 1.
+    tp = np.maximum((tmax[first] - start[first]) / 3.6e12, step)
+    #-normalized time and flow of each record
+    x = (t - start) / 3.6e12 / tp[event]
+    y = q / qmax
+    #-offset the events, and clip the sample points to the duration of each event (the shape is constant after the end of the event)
+    offset = x.max() + 1.
+    x = x + event * offset
+    xend = x[np.append(first[1:], len(x)) - 1]
+    xs = np.minimum(tau[None, :] + (np.arange(len(first)) * offset)[:, None], xend[:, None])
+    shapes = np.interp(xs.ravel(), x, y).reshape(len(first), len(tau)).astype(np.float32)
+    meta = {'site': np.full(len(first), '' if site is None else str(site)), 'Peak nr.': peak[first],
+            'Peakflow starts': start[first].view('M8[ns]'), 'Max. flow [m^3 s^-1]': qmax[first], 'Tp [hour]': tp}
+    return shapes, meta
+
+def eventShapes(results, site=None, n=64, tau_max=4.):
+    '''
+    Builds a library with the normalized shapes of the peakflow events in the output of 'sepBaseflow'. The flow of each event
+    ('Total runoff interp. [m^3 s^-1]') is divided by its maximum flow, and the time since the start of the event is divided by its time to
+    peak, such that all events have a maximum of 1 at a normalized time of 1. The shapes are sampled at n points between 0 and tau_max.
+    ------------------------------------------------------------------------------------------------------------------------------------
+    Input:
+        results:   Output of 'sepBaseflow' for a single site, dictionary with the site name as key and the output of 'sepBaseflow' as
+                   value, or the output of 'sepBaseflowBatch' (with a 'Site' index level).
+        site:      (Optional) Site name used if results is the output for a single site. Default is None.
+        n:         Number of points of each shape. Default is 64.
+        tau_max:   Normalized time (time since start / time to peak) of the last point. Default is 4.
+    ------------------------------------------------------------------------------------------------------------------------------------
+    Returns:
+        library:   Dictionary with the numpy arrays 'shapes' (events x n, float32), 'norms' (squared norm of each shape), 'tau' (normalized
+                   time of the points), and the metadata of each event: 'site', 'Peak nr.', 'Peakflow starts', 'Max. flow [m^3 s^-1]' and
+                   'Tp [hour]'.
+    '''
+    tau = np.linspace(0., tau_max, n)
+    if isinstance(results, dict):
+        parts = [siteShapes(df, s, tau) for s, df in results.items()]
+    elif 'Site' in results.index.names:
+        parts = [siteShapes(df.droplevel('Site'), s, tau) for s, df in results.groupby(level='Site', sort=False)]
+    else:
+        parts = [siteShapes(results, site, tau)]
+    shapes = np.concatenate([p[0] for p in parts])
+    library = {'shapes': shapes, 'norms': np.einsum('ij,ij->i', shapes, shapes, dtype=np.float64), 'tau': tau}
+    for c in parts[0][1]:
+        library[c] = np.concatenate([p[1][c] for p in parts])
+    return library
+
+def saveShapeLibrary(fname, library):
+    '''
+    Saves a shape library (see 'eventShapes') to fname in numpy *.npz format.
+    '''
+    np.savez(fname, **library)
+
+def loadShapeLibrary(fname):
+    '''
+    Loads a shape library that was saved with 'saveShapeLibrary'. Returns a dictionary with numpy arrays.
+    '''
+    with np.load(fname) as f:
+        return {k: f[k] for k in f.files}
+
+def shapeTree(library):
+    '''
+    Returns a k-d tree (scipy.spatial.cKDTree) of the shapes in a library, which can be passed to 'nearestShapes'. A k-d tree is only faster
+    than the brute-force search for shapes with few points (small n in 'eventShapes').
+    '''
+    from scipy.spatial import cKDTree
+    return cKDTree(library['shapes'])
+
+def nearestShapes(library, queries, k=5, upto=None, tree=None, chunk=256):
+    '''
+    Finds the k events in a library with the shapes most similar (smallest Euclidean distance) to each query shape. Without a tree, the
+    distances of a chunk of queries to all shapes are calculated at once with a matrix multiplication (|q - s|^2 = |q|^2 + |s|^2 - 2 q.s),
+    using the precomputed norms of the library, and the distances of the 4k best candidates are then calculated exactly.
+    ------------------------------------------------------------------------------------------------------------------------------------
+    Input:
+        library:   Shape library (see 'eventShapes' and 'loadShapeLibrary').
+        queries:   Numpy array (queries x n) with the query shapes, e.g. the 'shapes' of a library built from recent data, or a single shape.
+        k:         Number of events to return for each query. Default is 5.
+        upto:      (Optional) Normalized time up to which the shapes are compared, e.g. for a developing event of which only the first part
+                   is known. Default is None (the full shapes are compared).
+        tree:      (Optional) k-d tree of the library (see 'shapeTree'). Only used if upto is None.
+        chunk:     Number of queries for which the distances are calculated at once. Default is 256.
+    ------------------------------------------------------------------------------------------------------------------------------------
+    Returns:
+        rows:      Numpy array (queries x k) with the rows in the library of the most similar events, sorted by distance. The metadata of
+                   the events is selected with e.g. library['site'][rows] and library['Peakflow starts'][rows].
+        distance:  Numpy array (queries x k) with the distances.
+    '''
+    queries = np.atleast_2d(np.asarray(queries, dtype=np.float32))
+    shapes = library['shapes']
+    k = min(k, len(shapes))
+    if upto is None and tree is not None:
+        distance, rows = tree.query(queries, k=k)
+        return rows.reshape(len(queries), k), distance.reshape(len(queries), k)
+    if upto is None:
+        norms = library['norms']
+    else:
+        m = np.searchsorted(library['tau'], upto, 'right')
+        shapes = shapes[:, :m]
+        queries = queries[:, :m]
+        norms = np.einsum('ij,ij->i', shapes, shapes, dtype=np.float64)
+    #-the shapes are ranked by |s|^2 - 2 q.s (float32), and the distances of the best candidates are calculated exactly
+    norms = norms.astype(np.float32)
+    c = min(4 * k, len(shapes))
+    rows = np.empty((len(queries), k), dtype=np.int64)
+    distance = np.empty((len(queries), k))
+    for i in range(0, len(queries), chunk):
+        q = queries[i:i+chunk]
+        d2 = q @ shapes.T
+        d2 *= -2.
+        d2 += norms
+        r = np.argpartition(d2, c - 1, axis=1)[:, :c] if c < len(shapes) else np.broadcast_to(np.arange(c), (len(q), c))
+        diff = shapes[r].astype(np.float64) - q[:, None, :]
+        d = np.einsum('ijk,ijk->ij', diff, diff)
+        order = np.argsort(d, axis=1)[:, :k]
+        rows[i:i+chunk] = np.take_along_axis(r, order, axis=1)
+        distance[i:i+chunk] = np.sqrt(np.take_along_axis(d, order, axis=1))
+    return rows, distance
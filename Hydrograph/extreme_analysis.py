@@ -14,18 +14,10 @@ from scipy.stats import genextreme
 
 #-some matplotlib libraries
 import matplotlib.pyplot as plt
-from matplotlib import rcParams
 from matplotlib.ticker import FormatStrFormatter
 
-rcParams.update({'font.size': 9})
-colors = [(31, 119, 180), (174, 199, 232), (255, 127, 14), (255, 187, 120),    
-             (44, 160, 44), (152, 223, 138), (214, 39, 40), (255, 152, 150),    
-             (148, 103, 189), (197, 176, 213), (140, 86, 75), (196, 156, 148),    
-             (227, 119, 194), (247, 182, 210), (127, 127, 127), (199, 199, 199),    
-             (188, 189, 34), (219, 219, 141), (23, 190, 207), (158, 218, 229)]
-for i in range(len(colors)):
-    r, g, b = colors[i]
-    colors[i] = (r / 255., g / 255., b / 255.)
+#-font size (set on import) and colors
+from Hydrograph.plot_style import colors
 
 pd.options.display.max_columns = 100
 
@@ -163,4 +155,43 @@ def fitGEV(x, Tmax):
     gev_fit = genextreme.fit(x,c)
     gev_inv = genextreme.ppf(1-probs, gev_fit[0], gev_fit[1], gev_fit[2])
     return gev_fit, gev_inv
-    
+
+def plotLMomentRatios(df_sites, region, Title, fname=None):
+    '''
+    Plots the L-moment ratio diagram (L-skewness vs. L-kurtosis) of the sites in a region, together with the regional average and the
+    theoretical curves of the generalized extreme value (GEV), generalized logistic (GLO) and generalized Pareto (GPA) distributions.
+    -------------------------------------------------------------------------------------------
+    Input:
+        df_sites:     Pandas dataframe with the site L-moments, as returned by 'regionalFrequency'
+        region:       Dictionary with the regional L-moment ratios, as returned by 'regionalFrequency'
+        Title:        Str chart title
+        fname:        (Optional) Full path to filename to save the figure in *.png format
+    '''
+    #-imported here, so that only this plot depends on Hydrograph.regional
+    from Hydrograph.regional import kappaRatios
+
+    #-theoretical curves
+    t3 = np.linspace(-0.2, 0.6, 200)
+    glo = (1 + 5 * t3**2) / 6
+    gpa = t3 * (1 + 5 * t3) / (5 + t3)
+    gev = np.array([kappaRatios(k, 0.) for k in np.linspace(-0.7, 0.9, 200)])
+    bound = (5 * t3**2 - 1) / 4
+
+    fig, ax = plt.subplots(1, 1)
+    ax.plot(gev[:,0], gev[:,1], color=colors[0], label='GEV')
+    ax.plot(t3, glo, color=colors[2], label='GLO')
+    ax.plot(t3, gpa, color=colors[4], label='GPA')
+    ax.plot(t3, bound, 'k--', linewidth=.5, label='Lower bound')
+    ax.scatter(df_sites['L-skewness'], df_sites['L-kurtosis'], color='k', s=15, label='Sites')
+    ax.scatter(region['L-skewness'], region['L-kurtosis'], color=colors[6], marker='s', s=60, label='Regional average')
+    ax.grid(True, which='both')
+    plt.xlim(t3.min(), t3.max())
+    plt.ylim(-0.1, 0.5)
+    plt.xlabel('L-skewness [-]')
+    plt.ylabel('L-kurtosis [-]')
+    plt.title(Title)
+    ax.legend(loc='upper left')
+    if fname:
+        plt.savefig(fname, dpi=600.)
+    else:
+        plt.show()
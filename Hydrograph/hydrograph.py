@@ -11,9 +11,15 @@ __date__ ='December 2019'
 import pandas as pd
 import numpy as np
 
-def sepBaseflow(x, dt, A, k=0.000546, dt_max=None, tp_min=None):
+from Hydrograph.baseflow_filters import lyneHollick, eckhardt
+
+def sepBaseflow(x, dt, A, k=0.000546, dt_max=None, tp_min=None, compact=False, drop_raw=False, method='hewlett-hibbert', alpha=None,
+                bfi_max=0.8, passes=None, peak_min=0.2, qc=None):
     '''
-    Separate a time-series into baseflow and peakflow. Fills missing flow records by interpolation.
+    Separate a time-series into baseflow and peakflow. Fills missing flow records by interpolation. By default the baseflow is separated
+    using the constant slope method of Hewlett and Hibbert (1967). Alternatively, the recursive digital filters of Lyne and Hollick (1979)
+    or Eckhardt (2005) can be selected with 'method' (see 'Hydrograph.baseflow_filters'). Peakflow events are where the total runoff
+    exceeds the baseflow; for the filters, by more than a fraction 'peak_min' of the baseflow.
     
     -----------------------------------------------------------------------------------------------
     Input:
@@ -25,6 +31,19 @@ def sepBaseflow(x, dt, A, k=0.000546, dt_max=None, tp_min=None):
         A:          Catchment area in km^2 upstream of point of interest.
         dt_max:     Only interpolate over maximum number of consecutive NaN defined over time period dt_max in hours.
         tp_min:     Minimum duration of runoff peak in hours to be selected as being a peak.
+        compact:    (Optional) If True, returns memory-lean dtypes for the output columns (see 'compactOutput'). Default is False.
+        drop_raw:   (Optional) If True, drops the 'Total runoff [m^3 s^-1]' column from the output. Default is False.
+        method:     (Optional) Baseflow separation method: 'hewlett-hibbert' (default), 'lyne-hollick' or 'eckhardt'. The parameter k is only
+                    used by 'hewlett-hibbert'.
+        alpha:      (Optional) Filter parameter of the 'lyne-hollick' (default 0.925) or 'eckhardt' (default 0.98) method for daily data.
+                    The parameter is scaled to the time-step dt (e.g. 0.98 becomes 0.98 ** (15 / 1440) for dt=15).
+        bfi_max:    (Optional) Maximum baseflow index of the 'eckhardt' method. Default is 0.8.
+        passes:     (Optional) Number of filter passes of the 'lyne-hollick' (default 3) or 'eckhardt' (default 1) method.
+        peak_min:   (Optional) Minimum peakflow as a fraction of the baseflow for a record to be part of a peakflow event, for the
+                    'lyne-hollick' and 'eckhardt' methods. The peakflow of the other records is set to 0. Default is 0.2.
+        qc:         (Optional) Pandas series with the same index as x, being True (or a non-zero quality code) for records that failed the
+                    quality control (see 'Hydrograph.quality'). These records are removed before the interpolation, so they are filled by
+                    interpolation in 'Total runoff interp. [m^3 s^-1]'. 'Total runoff [m^3 s^-1]' keeps the recorded values.
     -----------------------------------------------------------------------------------------------
     Returns:
         df_final:    Pandas dataframe with datetime index and the following columns:
@@ -43,6 +62,9 @@ def sepBaseflow(x, dt, A, k=0.000546, dt_max=None, tp_min=None):
                         Tp [hour]:                       Time to peak.
     '''
 
+    if method not in ['hewlett-hibbert', 'lyne-hollick', 'eckhardt']:
+        raise ValueError("method should be 'hewlett-hibbert', 'lyne-hollick' or 'eckhardt'")
+
     minDate = x.index.min()
     maxDate = x.index.max()
     #-date range for full period (set it depending on the defined time interval)
@@ -63,63 +85,87 @@ def sepBaseflow(x, dt, A, k=0.000546, dt_max=None, tp_min=None):
     df_final.drop('Time_diff', axis=1, inplace=True)
     df_final.set_index('Date', inplace=True)
     
-    df_final['Total runoff [m^3 s^-1]'] = x; x = None;
+    df_final['Total runoff [m^3 s^-1]'] = x
+    q = df_final['Total runoff [m^3 s^-1]']
+    #-remove records that failed the quality control before the interpolation (the recorded values are kept in the output)
+    if qc is not None:
+        if not isinstance(qc, pd.Series):
+            qc = pd.Series(np.asarray(qc), index=x.index)
+        q = q.mask(qc.reindex(df_final.index).fillna(0).to_numpy() != 0)
+        qc = None
+    x = None
     #-only interpolate maximum number of consecutive NaNs. dt_max is in hours, so to calculate nr of timesteps depending on the set time-interval
     if dt_max:
         if dt == 5:
-            df_final['Total runoff interp. [m^3 s^-1]'] = df_final['Total runoff [m^3 s^-1]'].interpolate(method='time', limit=dt_max*12)
+            df_final['Total runoff interp. [m^3 s^-1]'] = q.interpolate(method='time', limit=dt_max*12)
         elif dt == 15:
-            df_final['Total runoff interp. [m^3 s^-1]'] = df_final['Total runoff [m^3 s^-1]'].interpolate(method='time', limit=dt_max*4)
+            df_final['Total runoff interp. [m^3 s^-1]'] = q.interpolate(method='time', limit=dt_max*4)
         else:
-            df_final['Total runoff interp. [m^3 s^-1]'] = df_final['Total runoff [m^3 s^-1]'].interpolate(method='time', limit=dt_max)
+            df_final['Total runoff interp. [m^3 s^-1]'] = q.interpolate(method='time', limit=dt_max)
     else:
-        df_final['Total runoff interp. [m^3 s^-1]'] = df_final['Total runoff [m^3 s^-1]'].interpolate(method='time')
+        df_final['Total runoff interp. [m^3 s^-1]'] = q.interpolate(method='time')
     df_final['Baseflow [m^3 s^-1]'] = np.nan
     df_final['Peakflow [m^3 s^-1]'] = np.nan
      
-    cnt=0
-    flag = True   #-flag to define new baseflow threshold
-    t=0
-    Qthresh = False
-    for i in df_final.iterrows():
-        dindex = i[0]
-        print(dindex)
-        Qtot = i[1]['Total runoff interp. [m^3 s^-1]']
-        QBase = Qtot
+    #-the filter parameters are defined for daily data, and are scaled to the time-step of the date range
+    step = {5: 5, 15: 15}.get(dt, 60)
+    if method == 'lyne-hollick':
+        df_final['Baseflow [m^3 s^-1]'] = lyneHollick(df_final['Total runoff interp. [m^3 s^-1]'].to_numpy(), alpha or 0.925, passes or 3,
+                                                      step)
+    elif method == 'eckhardt':
+        df_final['Baseflow [m^3 s^-1]'] = eckhardt(df_final['Total runoff interp. [m^3 s^-1]'].to_numpy(), alpha or 0.98, bfi_max, passes or 1,
+                                                   step)
+    else:
+        #-Hewlett and Hibbert constant slope separation
+        cnt=0
+        flag = True   #-flag to define new baseflow threshold
+        t=0
+        Qthresh = False
+        for i in df_final.iterrows():
+            dindex = i[0]
+            print(dindex)
+            Qtot = i[1]['Total runoff interp. [m^3 s^-1]']
+            QBase = Qtot
          
-        #-For first record, baseflow equals total runoff
-        if cnt==0:
-            df_final.loc[df_final.index==dindex, 'Baseflow [m^3 s^-1]'] = Qtot
-        else:
-            #-Total runoff of t-1
-            QtotOld = df_final.iloc[cnt-1,2]
-            dt = df_final.iloc[cnt,0]
+            #-For first record, baseflow equals total runoff
+            if cnt==0:
+                df_final.loc[df_final.index==dindex, 'Baseflow [m^3 s^-1]'] = Qtot
+            else:
+                #-Total runoff of t-1
+                QtotOld = df_final.iloc[cnt-1,2]
+                dt = df_final.iloc[cnt,0]
 
-            #-Check whether increase in streamflow between two time-steps is larger than k * dt * A, and thus indicates the start of the rising limb
-            if (Qtot > (QtotOld + (k * dt * A))) and flag:
-                Qthresh = QtotOld
-                flag = False
-                t = 0
-            #-Linearly calculate baseflow using time difference and threshold
-            if Qthresh:
-                t+=dt
-                QBase = Qthresh + (k * t * A)
-            #-Check if recession limb is below the baseflow curve 
-            if QBase>Qtot:
-                Qthresh = False
-                flag = True
-            #-Make sure baseflow does not exceed total runoff at any point in time
-            QBase = min(QBase, Qtot)
+                #-Check whether increase in streamflow between two time-steps is larger than k * dt * A, and thus indicates the start of the rising limb
+                if (Qtot > (QtotOld + (k * dt * A))) and flag:
+                    Qthresh = QtotOld
+                    flag = False
+                    t = 0
+                #-Linearly calculate baseflow using time difference and threshold
+                if Qthresh:
+                    t+=dt
+                    QBase = Qthresh + (k * t * A)
+                #-Check if recession limb is below the baseflow curve 
+                if QBase>Qtot:
+                    Qthresh = False
+                    flag = True
+                #-Make sure baseflow does not exceed total runoff at any point in time
+                QBase = min(QBase, Qtot)
                  
-            #-Fill in the final dataframe
-            df_final.loc[df_final.index==dindex, 'Baseflow [m^3 s^-1]'] = QBase
+                #-Fill in the final dataframe
+                df_final.loc[df_final.index==dindex, 'Baseflow [m^3 s^-1]'] = QBase
          
-        cnt+=1
+            cnt+=1
+   
    
-    df_final['Baseflow [m^3 s^-1]'] = df_final[['Baseflow [m^3 s^-1]', 'Total runoff [m^3 s^-1]']].min(axis=1)
+    #-baseflow does not exceed the recorded flow (without the records that failed the quality control)
+    df_final['Baseflow [m^3 s^-1]'] = pd.concat([df_final['Baseflow [m^3 s^-1]'], q], axis=1).min(axis=1); q = None
     #df_final = df_final.astype(np.float)
       
     df_final['Peakflow [m^3 s^-1]'] = df_final['Total runoff interp. [m^3 s^-1]'] - df_final['Baseflow [m^3 s^-1]']
+    #-the filtered baseflow is smooth and lies (slightly) below the flow at most records, so small peakflows are not part of an event
+    if method != 'hewlett-hibbert':
+        p = df_final['Peakflow [m^3 s^-1]']
+        df_final['Peakflow [m^3 s^-1]'] = p.mask(p <= peak_min * df_final['Baseflow [m^3 s^-1]'], 0.); p = None
 
     #-Now filter the peaks and assign peak numbers
     df_final = filterpeaks(df_final, tp_min)
@@ -141,7 +187,7 @@ def sepBaseflow(x, dt, A, k=0.000546, dt_max=None, tp_min=None):
     df_final.loc[pd.isna(df_final['Peak nr.']), 'Flow volume [m^3]'] = np.nan
     #-Max flow and time of max flow
     df_final['Max. flow [m^3 s^-1]'] = np.nan
-    df_final['Date max. flow'] = np.nan
+    df_final['Date max. flow'] = pd.NaT
     df_final['Tp [hour]'] = np.nan
     for i in pd.unique(df_final['Peak nr.']):
         df_short = df_final.loc[df_final['Peak nr.'] ==i, ['Date', 'Total runoff interp. [m^3 s^-1]']]#,'Max. flow [m^3 s^-1]']]
@@ -150,13 +196,45 @@ def sepBaseflow(x, dt, A, k=0.000546, dt_max=None, tp_min=None):
         mdate = df_short['Date'].min()
         df_final.loc[df_final['Peak nr.'] ==i, 'Max. flow [m^3 s^-1]'] = mflow
         df_final.loc[df_final['Peak nr.'] ==i, 'Date max. flow'] = mdate
-    df_final['Date max. flow'] = pd.to_datetime(df_final['Date max. flow'])
     df_final['Tp [hour]'] = (df_final['Date max. flow'] - df_final['Peakflow starts']).dt.seconds / 3600
     df_final.set_index('Date', inplace=True)
+    if drop_raw:
+        df_final.drop('Total runoff [m^3 s^-1]', axis=1, inplace=True)
+    if compact:
+        df_final = compactOutput(df_final)
 
     print('Processing completed successfully.')
      
     return df_final
+
+
+def compactOutput(df):
+    '''
+    Converts the output of 'sepBaseflow' to memory-lean dtypes. The flow columns and 'Tp [hour]' are stored as float32 and 'Peak nr.' as
+    a nullable 32-bit integer. The 'dt [hour]' and 'Flow volume [m^3]' columns are kept as float64, so event durations and volumes (and
+    thus the volumes calculated by 'maxFlowVolStats') are identical to those of the full precision output.
+
+    Accuracy: float32 has a 24-bit significand, so each flow value differs from its float64 value by at most a relative error of
+    2^-24 (approx. 6e-8); e.g. at most 0.001 m^3 s^-1 for a flow of 10000 m^3 s^-1. Peak numbers and timestamps are stored exactly.
+
+    Depending on whether the raw flow column has been dropped, the memory use of the output is reduced by approx. 25 to 30%
+    (see 'test/benchmark_compact.py').
+
+    ------------------------------------------------------------------------------------------------------------------------------------
+    Input:
+        df:    Pandas dataframe as returned by 'sepBaseflow'.
+    ------------------------------------------------------------------------------------------------------------------------------------
+    Returns:
+        df_compact:    Pandas dataframe with the same index and columns as df, but with memory-lean dtypes.
+    '''
+    df_compact = df.copy(); df = None
+    for c in ['Total runoff [m^3 s^-1]', 'Total runoff interp. [m^3 s^-1]', 'Baseflow [m^3 s^-1]', 'Peakflow [m^3 s^-1]',
+              'Max. flow [m^3 s^-1]', 'Tp [hour]']:
+        if c in df_compact.columns:
+            df_compact[c] = df_compact[c].astype(np.float32)
+    if 'Peak nr.' in df_compact.columns:
+        df_compact['Peak nr.'] = df_compact['Peak nr.'].astype('Int32')
+    return df_compact
     
 
 def filterpeaks(x, tp_min):
@@ -273,3 +351,79 @@ def maxFlowVolStats(df):
     y_peak_maxvol = None; y_max = None
 
     return vol_peak_combined
+
+
+def volumeIndex(df):
+    '''
+    Builds a cumulative flow volume index (prefix-sum) of the total flow volume of the 'sepBaseflow' output. The index only needs to be
+    built once and can then be re-used by 'maxDurationVolumes' to calculate the maximum volume over any number of durations. The index
+    includes the flow between peakflow events (volume = 'Total runoff interp. [m^3 s^-1]' * 3600 * 'dt [hour]'), so yearly windows that
+    span the gap between events contain the total flow volume; within events the volumes are those of 'Flow volume [m^3]'. Missing
+    records (gaps that are not interpolated) contribute zero volume to the index.
+
+    ------------------------------------------------------------------------------------------------------------------------------------
+    Input:
+        df:    Pandas dataframe with datetime index with 'Date' label and columns:
+                  dt [hour]:                          Time difference in hours between two records.
+                  Total runoff interp. [m^3 s^-1]:    Total runoff with missing records interpolated.
+                  Flow volume [m^3]:                  Volume of the flow between two time-steps (total volume; i.e. baseflow + peakflow).
+                  Peak nr.:                           Assigned peak number to each flow peak.
+    ------------------------------------------------------------------------------------------------------------------------------------
+    Returns:
+        vol_index:     Pandas dataframe with datetime index and the following columns:
+            Peak nr.:                         Assigned peak number to each flow peak.
+            Cum. volume [m^3]:                Cumulative flow volume from the first record up to and including the record.
+    '''
+    vol_index = pd.DataFrame(index=df.index)
+    vol_index['Peak nr.'] = df['Peak nr.']
+    #-'Flow volume [m^3]' is only given within events, so the volume between events is calculated from the total runoff
+    vol = df['Total runoff interp. [m^3 s^-1]'].astype(np.float64) * 3600 * df['dt [hour]']
+    vol_index['Cum. volume [m^3]'] = df['Flow volume [m^3]'].fillna(vol).fillna(0).cumsum()
+    return vol_index
+
+def maxDurationVolumes(vol_index, durations, by='event'):
+    '''
+    Calculates the maximum flow volume over rolling windows of one or more durations, for each peakflow event or for each year. Window
+    volumes are calculated as the difference between two values of the cumulative volume index, so each window costs a constant amount
+    of work regardless of its duration. A window is labelled by the record at which it ends and covers the records within 'duration'
+    hours up to and including that record. If 'by' is 'event', windows are clipped to the start of the event, meaning that for events
+    shorter than the duration the total event volume is returned.
+
+    ------------------------------------------------------------------------------------------------------------------------------------
+    Input:
+        vol_index:     Pandas dataframe with the cumulative volume index as returned by 'volumeIndex'.
+        durations:     List with window durations in hours (e.g. [1, 6, 24, 72]).
+        by:            'event' to calculate the maximum volumes for each peakflow event, or 'year' to calculate them for each year.
+    ------------------------------------------------------------------------------------------------------------------------------------
+    Returns:
+        df_max:        Pandas dataframe with 'Peak nr.' (by='event') or 'Year' (by='year') as index and for each duration a column
+                       'Max. <duration>h volume [m^3]' with the maximum flow volume over that duration.
+    '''
+    if by not in ['event', 'year']:
+        raise ValueError("by should be either 'event' or 'year'")
+
+    t = vol_index.index.values.astype('datetime64[ns]').astype(np.int64)
+    cumvol = np.concatenate([[0.], vol_index['Cum. volume [m^3]'].to_numpy(dtype=np.float64)])
+    peaknr = vol_index['Peak nr.']
+    end = np.arange(len(t))
+    if by == 'event':
+        #-first record of the event each record belongs to
+        first = pd.Series(end, index=vol_index.index).groupby(peaknr).transform('min').to_numpy()
+        groups = peaknr.to_numpy()
+        sel = ~pd.isna(groups)
+        label = 'Peak nr.'
+    else:
+        groups = vol_index.index.year.to_numpy()
+        sel = np.ones(len(t), dtype=bool)
+        label = 'Year'
+
+    df_max = pd.DataFrame()
+    for d in durations:
+        #-first record within the window ending at each record
+        start = np.searchsorted(t, t - int(d * 3600 * 1e9), side='right')
+        if by == 'event':
+            start = np.maximum(start, np.where(sel, first, 0).astype(np.int64))
+        vol = cumvol[end + 1] - cumvol[start]
+        df_max['Max. %gh volume [m^3]' %d] = pd.Series(vol[sel]).groupby(groups[sel]).max()
+    df_max.index.name = label
+    return df_max
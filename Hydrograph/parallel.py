@@ -0,0 +1,163 @@
+# -*- coding: utf-8 -*-
+
+#-Authorship information-########################################################################################################################
+__author__ = 'Wilco Terink'
+__copyright__ = 'Wilco Terink'
+__version__ = '1.0.1'
+__email__ = 'wilco.terink@ecan.govt.nz'
+__date__ ='December 2019'
+#################################################################################################################################################
+
+import contextlib
+import ctypes
+import io
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import pandas as pd
+import numpy as np
+
+from Hydrograph.hydrograph import sepBaseflow
+
+#-Columns of the sepBaseflow output, stored in a float64 block and in a datetime64[ns] block in shared memory
+FLOAT_COLUMNS = ['dt [hour]', 'Total runoff [m^3 s^-1]', 'Total runoff interp. [m^3 s^-1]', 'Baseflow [m^3 s^-1]', 'Peakflow [m^3 s^-1]',
+                 'Peak nr.', 'Flow volume [m^3]', 'Max. flow [m^3 s^-1]', 'Tp [hour]']
+DATE_COLUMNS = ['Peakflow starts', 'Peakflow ends', 'Date max. flow']
+
+#-Shared memory blocks that could not be closed because their arrays were still referenced after leaving 'sharedSepBaseflow'
+_unreleased = []
+
+def arrayViews(shm, handle):
+    '''
+    Returns a list with numpy arrays that are views on shared memory block shm. Handle is a dictionary with the block 'name' and a list
+    'arrays' with (dtype, shape) for each array in the block.
+    '''
+    #-numpy does not keep a buffer export on shm.buf, so closing the block would leave dangling arrays. A ctypes array does keep the
+    #-export, so closing the block while views on it are still referenced raises a BufferError instead.
+    buf = (ctypes.c_char * shm.size).from_buffer(shm.buf)
+    views = []
+    offset = 0
+    for dtype, shape in handle['arrays']:
+        a = np.ndarray(shape, dtype=dtype, buffer=buf, offset=offset)
+        views.append(a)
+        offset += a.nbytes
+    return views
+
+def createArrays(arrays):
+    '''
+    Creates a shared memory block for a list with (dtype, shape) of the arrays to store in it. Returns the block, its handle (see
+    'arrayViews') and a list with the (uninitialised) numpy arrays.
+    '''
+    size = sum(int(np.prod(shape)) * np.dtype(dtype).itemsize for dtype, shape in arrays)
+    shm = shared_memory.SharedMemory(create=True, size=max(size, 1))
+    handle = {'name': shm.name, 'arrays': [(np.dtype(dtype).str, tuple(shape)) for dtype, shape in arrays]}
+    return shm, handle, arrayViews(shm, handle)
+
+def sepBaseflowWorker(in_handle, out_handle, dt, A, k, dt_max, tp_min):
+    '''
+    Runs 'sepBaseflow' in a worker process on the timestamps and flows in shared memory block in_handle, and writes the output columns
+    into shared memory block out_handle. Only the handles are passed to the worker, so the data itself is not pickled.
+    '''
+    shm_in = shared_memory.SharedMemory(name=in_handle['name'])
+    shm_out = shared_memory.SharedMemory(name=out_handle['name'])
+    t, q = arrayViews(shm_in, in_handle)
+    fblock, dblock = arrayViews(shm_out, out_handle)
+    try:
+        x = pd.DataFrame({'Total runoff [m^3 s^-1]': q}, index=pd.DatetimeIndex(t.view('M8[ns]'), name='Date'))
+        with contextlib.redirect_stdout(io.StringIO()):
+            df = sepBaseflow(x, dt, A, k, dt_max, tp_min); x = None
+        for i, c in enumerate(FLOAT_COLUMNS):
+            fblock[i] = df[c].to_numpy(dtype=np.float64)
+        for i, c in enumerate(DATE_COLUMNS):
+            dblock[i] = df[c].to_numpy(dtype='M8[ns]').view(np.int64)
+        df = None
+    finally:
+        del t, q, fblock, dblock
+        shm_in.close()
+        shm_out.close()
+    return True
+
+@contextlib.contextmanager
+def sharedSepBaseflow(sites, dt, A, k=0.000546, dt_max=None, tp_min=None, workers=None):
+    '''
+    Runs 'sepBaseflow' for multiple sites in parallel, using shared memory to transfer the data to and from the worker processes. The
+    timestamps and flows of each site are placed in a shared memory block, and the output columns are written by the workers into a
+    second shared memory block that is allocated by the parent process. The workers only receive the names of the blocks, and the
+    returned dataframes are zero-copy views on the output blocks. This avoids pickling of (multi-million-row) dataframes. Requires
+    Python 3.8 or newer.
+
+    Use as a context manager; the shared memory is released when leaving the with-block, so results that are needed afterwards should
+    be copied (e.g. df.copy()) inside the with-block:
+
+        with sharedSepBaseflow({'site1': df1, 'site2': df2}, 15, {'site1': 1461, 'site2': 500}, workers=4) as results:
+            stats = {site: maxFlowVolStats(df) for site, df in results.items()}
+
+    ------------------------------------------------------------------------------------------------------------------------------------
+    Input:
+        sites:      Dictionary with the site name as key and a pandas dataframe as input for 'sepBaseflow' as value.
+        dt:         Minimum time-step interval (in minutes) for analysing the data. Minute choices are 5, 15, or 60.
+        A:          Catchment area in km^2 upstream of point of interest, or dictionary with the catchment area for each site.
+        k:          Slope of the dividing line (see 'sepBaseflow'), or dictionary with the slope for each site.
+        dt_max:     Only interpolate over maximum number of consecutive NaN defined over time period dt_max in hours.
+        tp_min:     Minimum duration of runoff peak in hours to be selected as being a peak.
+        workers:    (Optional) Number of worker processes. Default is the number of processors.
+    ------------------------------------------------------------------------------------------------------------------------------------
+    Returns:
+        results:    Dictionary with the site name as key and the output of 'sepBaseflow' as value. The dataframes have the same columns as
+                    the output of 'sepBaseflow', but the columns with timestamps are placed at the end.
+    '''
+    freq = {5: 5, 15: 15}.get(dt, 60) * 60 * 10**9
+    blocks = []
+    results = {}
+    try:
+        handles = {}
+        for site, x in sites.items():
+            t = x.index.values.astype('M8[ns]').view(np.int64)
+            n = len(t)
+            #-length of the date range created by sepBaseflow
+            n_out = int((t.max() - t.min()) // freq + 1)
+            shm_in, in_handle, (t_sh, q_sh) = createArrays([(np.int64, (n,)), (np.float64, (n,))])
+            blocks.append(shm_in)
+            t_sh[:] = t
+            q_sh[:] = x['Total runoff [m^3 s^-1]'].to_numpy(dtype=np.float64)
+            t_sh = None; q_sh = None
+            shm_out, out_handle, views = createArrays([(np.float64, (len(FLOAT_COLUMNS), n_out)), (np.int64, (len(DATE_COLUMNS), n_out))])
+            blocks.append(shm_out)
+            views = None
+            handles[site] = {'in': in_handle, 'out': out_handle, 'shm_in': shm_in, 'shm_out': shm_out, 't0': int(t.min()), 'n': n_out}
+
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = []
+            for site, h in handles.items():
+                a = A[site] if isinstance(A, dict) else A
+                kk = k[site] if isinstance(k, dict) else k
+                futures.append(pool.submit(sepBaseflowWorker, h['in'], h['out'], dt, a, kk, dt_max, tp_min))
+            for fut in futures:
+                fut.result()
+
+        for site, h in handles.items():
+            #-The input is no longer needed
+            h['shm_in'].close(); h['shm_in'].unlink()
+            blocks.remove(h['shm_in'])
+            #-Rebuild the dataframe as views on the output block
+            fblock, dblock = arrayViews(h['shm_out'], h['out'])
+            index = pd.DatetimeIndex(h['t0'] + freq * np.arange(h['n'], dtype=np.int64), name='Date')
+            df_f = pd.DataFrame(fblock.T, index=index, columns=FLOAT_COLUMNS, copy=False)
+            df_d = pd.DataFrame(dblock.view('M8[ns]').T, index=index, columns=DATE_COLUMNS, copy=False)
+            results[site] = pd.concat([df_f, df_d], axis=1, copy=False)
+            fblock = None; dblock = None; df_f = None; df_d = None
+        handles = None
+
+        yield results
+    finally:
+        results.clear()
+        for shm in blocks:
+            shm.unlink()
+            try:
+                shm.close()
+            except BufferError:
+                #-Arrays on the block are still referenced; the memory is freed by the OS once the process exits
+                _unreleased.append(shm)
+                warnings.warn('Shared memory block %s is still referenced after leaving sharedSepBaseflow; copy the results that are '
+                              'needed after the with-block.' %shm.name)
@@ -0,0 +1,126 @@
+# -*- coding: utf-8 -*-
+
+#-Authorship information-########################################################################################################################
+__author__ = 'Wilco Terink'
+__copyright__ = 'Wilco Terink'
+__version__ = '1.0.1'
+__email__ = 'wilco.terink@ecan.govt.nz'
+__date__ ='December 2019'
+#################################################################################################################################################
+
+import queue
+import threading
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+
+#-Marks the end of the items in a queue
+_DONE = object()
+
+def runPipeline(items, read, compute, write, workers=1, queue_size=None):
+    '''
+    Runs a read -> compute -> write pipeline over a list of items (e.g. site files), such that reading and writing (I/O) overlap with the
+    computation. Items are read by a reader thread and written by a writer thread, while the computation runs in a pool of worker
+    processes. The stages are connected by bounded queues: the reader blocks if the compute stage has queue_size items waiting, and the
+    compute stage does not submit new items if queue_size results are waiting to be written (backpressure). This keeps the memory use
+    bounded and makes the throughput limited by the computation rather than by I/O latency.
+
+    ------------------------------------------------------------------------------------------------------------------------------------
+    Input:
+        items:        List with the items to process.
+        read:         Function read(item) that returns a tuple with the arguments for compute. Runs in the reader thread.
+        compute:      Function compute(*args) that returns the result for an item. Runs in a worker process, so it should be a module
+                      level function and its arguments and result should be picklable.
+        write:        Function write(item, result) that writes the result of an item. Runs in the writer thread. Its return value is
+                      collected in the returned dictionary.
+        workers:      Number of worker processes for the compute stage. Default is 1.
+        queue_size:   (Optional) Maximum number of items waiting in each queue. Default is 2 * workers.
+    ------------------------------------------------------------------------------------------------------------------------------------
+    Returns:
+        written:      Dictionary with the item as key and the value returned by write as value.
+    '''
+    if not queue_size:
+        queue_size = 2 * workers
+    read_q = queue.Queue(maxsize=queue_size)
+    write_q = queue.Queue(maxsize=queue_size)
+    stop = threading.Event()
+    errors = []
+    written = {}
+
+    def put(q, x):
+        #-Blocking put that gives up if another stage has failed
+        while not stop.is_set():
+            try:
+                q.put(x, timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def get(q):
+        #-Blocking get that gives up if another stage has failed
+        while True:
+            try:
+                return q.get(timeout=0.1)
+            except queue.Empty:
+                if stop.is_set():
+                    return _DONE
+
+    def reader():
+        try:
+            for item in items:
+                if not put(read_q, (item, read(item))):
+                    return
+            put(read_q, _DONE)
+        except BaseException as e:
+            errors.append(e)
+            stop.set()
+
+    def writer():
+        try:
+            while True:
+                x = get(write_q)
+                if x is _DONE:
+                    return
+                item, result = x
+                written[item] = write(item, result)
+        except BaseException as e:
+            errors.append(e)
+            stop.set()
+
+    rt = threading.Thread(target=reader, name='pipeline-reader', daemon=True)
+    wt = threading.Thread(target=writer, name='pipeline-writer', daemon=True)
+    rt.start(); wt.start()
+
+    #-Compute stage: at most 'workers' items are computed at the same time, so the other items wait in the (bounded) read queue until a
+    #-worker becomes available. Results are passed on to the writer in the order in which they are completed.
+    pool = ProcessPoolExecutor(max_workers=workers)
+    running = {}
+    try:
+        done_reading = False
+        while not stop.is_set():
+            while not done_reading and len(running) < workers:
+                x = get(read_q)
+                if x is _DONE:
+                    done_reading = True
+                else:
+                    running[pool.submit(compute, *x[1])] = x[0]
+            if not running:
+                break
+            done = wait(running, return_when=FIRST_COMPLETED)[0]
+            for fut in done:
+                item = running.pop(fut)
+                if not put(write_q, (item, fut.result())):
+                    break
+        put(write_q, _DONE)
+    except BaseException as e:
+        errors.append(e)
+        stop.set()
+    finally:
+        for fut in running:
+            fut.cancel()
+        pool.shutdown(wait=True)
+        wt.join()
+        rt.join()
+
+    if errors:
+        raise errors[0]
+    return written
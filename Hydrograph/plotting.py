@@ -0,0 +1,119 @@
+# -*- coding: utf-8 -*-
+
+#-Authorship information-########################################################################################################################
+__author__ = 'Wilco Terink'
+__copyright__ = 'Wilco Terink'
+__version__ = '1.0.1'
+__email__ = 'wilco.terink@ecan.govt.nz'
+__date__ ='December 2019'
+#################################################################################################################################################
+
+import numpy as np
+
+#-some matplotlib libraries
+import matplotlib.pyplot as plt
+
+#-font size (set on import) and colors, shared with the plots of the extreme value analysis
+from Hydrograph.plot_style import colors
+
+def minMaxIndex(y, buckets):
+    '''
+    Returns the positions of the minimum, the maximum and the first missing value in each of the (equally sized) buckets of numpy array y.
+    Positions of buckets without missing values, and of empty buckets, are not returned.
+    '''
+    n = len(y)
+    size = -(-n // buckets)
+    nb = -(-n // size)
+    pad = np.full(nb * size, np.nan)
+    pad[:n] = y
+    pad = pad.reshape(nb, size)
+    isn = np.isnan(pad)
+    start = np.arange(nb) * size
+    imin = start + np.where(isn, np.inf, pad).argmin(axis=1)
+    imax = start + np.where(isn, -np.inf, pad).argmax(axis=1)
+    #-the padding at the end of the last bucket is not missing data
+    isn[-1, n - start[-1]:] = False
+    has_nan = isn.any(axis=1)
+    inan = start[has_nan] + isn[has_nan].argmax(axis=1)
+    return np.concatenate([imin, imax, inan])
+
+def decimationIndex(df, columns, buckets=2000, keep=None):
+    '''
+    Returns the sorted positions of the records of df to plot, such that the plotted lines look the same as when all records are plotted.
+    The records are divided in buckets (one bucket corresponds to about one pixel on the time axis), and for each column the records with
+    the minimum and maximum value in each bucket are kept (min-max decimation). The first missing record of each bucket is kept as well, so
+    gaps remain visible. If df is the output of 'sepBaseflow', the record with the maximum flow of each peakflow event is always kept.
+    ------------------------------------------------------------------------------------------------------------------------------------
+    Input:
+        df:         Pandas dataframe with a datetime index.
+        columns:    List with the columns to plot.
+        buckets:    Number of buckets. Default is 2000.
+        keep:       (Optional) Numpy array with the positions of records that are always kept.
+    ------------------------------------------------------------------------------------------------------------------------------------
+    Returns:
+        index:      Numpy array with the positions of the records to plot.
+    '''
+    n = len(df)
+    if n <= 2 * buckets:
+        return np.arange(n)
+    index = [np.array([0, n - 1])]
+    for c in columns:
+        index.append(minMaxIndex(df[c].to_numpy(dtype=np.float64), buckets))
+    if 'Date max. flow' in df.columns:
+        #-the record at the time of maximum flow of each event
+        index.append(np.flatnonzero(df.index.values == df['Date max. flow'].to_numpy(dtype='M8[ns]')))
+    if keep is not None:
+        index.append(np.asarray(keep, dtype=np.int64))
+    index = np.unique(np.concatenate(index))
+    return index[index < n]
+
+def plotHydrograph(df, columns=None, labels=None, stacked=False, buckets=2000, yLabel='Streamflow [m$^3$ s$^{-1}$]', Title=None,
+                   fname=None):
+    '''
+    Plots a hydrograph, e.g. the output of 'sepBaseflow'. Long time-series (e.g. decades of 5-minute records) are decimated before plotting
+    (see 'decimationIndex'), while keeping the maximum flow of every peakflow event.
+    -------------------------------------------------------------------------------------------
+    Input:
+        df:           Pandas dataframe with a datetime index
+        columns:      (Optional) List with the columns to plot. Default is 'Total runoff [m^3 s^-1]' and 'Total runoff interp. [m^3 s^-1]', or
+                      'Baseflow [m^3 s^-1]' and 'Peakflow [m^3 s^-1]' if stacked is True
+        labels:       (Optional) List with the legend label for each column. Default is the column names
+        stacked:      If True, each column is plotted on top of the previous columns (e.g. baseflow and peakflow). Default is False
+        buckets:      Number of buckets used for the decimation. Default is 2000
+        yLabel:       Str label to use for y-axis
+        Title:        (Optional) Str chart title
+        fname:        (Optional) Full path to filename to save the figure in *.png format
+    '''
+    if columns is None:
+        if stacked:
+            columns = ['Baseflow [m^3 s^-1]', 'Peakflow [m^3 s^-1]']
+        else:
+            columns = ['Total runoff [m^3 s^-1]', 'Total runoff interp. [m^3 s^-1]']
+    if labels is None:
+        labels = columns
+    y = [df[c].to_numpy(dtype=np.float64, na_value=np.nan) for c in columns]
+    if stacked:
+        #-the records are decimated on the stacked lines, so that their minima and maxima are kept
+        missing = np.isnan(y[0])
+        total = 0.
+        for i, v in enumerate(y):
+            total = total + np.where(np.isnan(v), 0., v)
+            y[i] = np.where(missing, np.nan, total)
+    keep = np.concatenate([minMaxIndex(v, buckets) for v in y]) if len(df) > 2 * buckets else None
+    index = decimationIndex(df, [], buckets, keep)
+    x = df.index.values[index]
+
+    fig, ax = plt.subplots(1, 1)
+    for i, v in enumerate(y):
+        ax.plot(x, v[index], color=colors[2*i], label=labels[i], linewidth=.75)
+    plt.xlabel('Date')
+    plt.ylabel(yLabel)
+    ax.grid(True)
+    if Title:
+        plt.title(Title)
+    ax.legend()
+    fig.autofmt_xdate()
+    if fname:
+        plt.savefig(fname, dpi=600.)
+    else:
+        plt.show()
@@ -0,0 +1,102 @@
+# -*- coding: utf-8 -*-
+
+#-Authorship information-########################################################################################################################
+__author__ = 'Wilco Terink'
+__copyright__ = 'Wilco Terink'
+__version__ = '1.0.1'
+__email__ = 'wilco.terink@ecan.govt.nz'
+__date__ ='December 2019'
+#################################################################################################################################################
+
+#-Quality control (QC) screening of recorded flow before baseflow separation. Each check is a vectorized operation over the whole series,
+#-and the result of each check is stored as a bit in a quality code, so a record can fail more than one check.
+
+import pandas as pd
+import numpy as np
+
+#-Quality code bits
+QC_MISSING = 1    #-missing record
+QC_RANGE = 2      #-flow outside the valid range
+QC_RATE = 4       #-rate of change larger than the maximum rate
+QC_FLAT = 8       #-part of a run of repeated values (flat-lined sensor)
+QC_SPIKE = 16     #-isolated spike
+QC_ALL = QC_MISSING | QC_RANGE | QC_RATE | QC_FLAT | QC_SPIKE
+
+def qualityCodes(x, A, q_min=0., q_max=None, max_rate=None, spike_rate=None, flat_hours=None):
+    '''
+    Screens the recorded flow for missing records, values outside the valid range, large rates of change, runs of repeated values and
+    isolated spikes. The rate limits are given per km^2 of catchment area (same unit as the slope k of 'sepBaseflow'), so the same limits can
+    be used for catchments of different size. The checks are skipped if their limit is not given.
+    ------------------------------------------------------------------------------------------------------------------------------------
+    Input:
+        x:            Pandas dataframe with Index being a pandas datetime index and a column labeled 'Total runoff [m^3 s^-1]' (the input of
+                      'sepBaseflow'), or a pandas series with the flow.
+        A:            Catchment area in km^2 upstream of point of interest.
+        q_min:        Minimum valid flow in cumecs. Default is 0.
+        q_max:        (Optional) Maximum valid flow in cumecs.
+        max_rate:     (Optional) Maximum rate of change of the flow in m^3 s^-1 km^-2 h^-1. A record is flagged if the change from the
+                      previous record is larger than max_rate * A * (time difference in hours), unless the change is the return from a spike.
+        spike_rate:   (Optional) Minimum rate of change in m^3 s^-1 km^-2 h^-1 that defines a spike. A record is an isolated spike if the
+                      flow jumps up (or down) from the previous record and back from the next record, with both changes larger than
+                      spike_rate * A * (time difference in hours).
+        flat_hours:   (Optional) Minimum duration in hours of a run of repeated non-zero values to be flagged as a flat-lined sensor.
+    ------------------------------------------------------------------------------------------------------------------------------------
+    Returns:
+        codes:        Pandas series (uint8) with the same index as x and the quality code of each record: 0 if the record passes all
+                      checks, otherwise the sum of the QC_* bits of the failed checks.
+    '''
+    if isinstance(x, pd.DataFrame):
+        x = x['Total runoff [m^3 s^-1]']
+    q = x.to_numpy(dtype=np.float64)
+    n = len(q)
+    codes = np.zeros(n, dtype=np.uint8)
+    if n == 0:
+        return pd.Series(codes, index=x.index, name='QC code')
+    #-time in nanoseconds
+    t = x.index.values.astype('M8[ns]').view(np.int64)
+
+    np.bitwise_or(codes, QC_MISSING, out=codes, where=np.isnan(q))
+    with np.errstate(invalid='ignore'):
+        bad = q < q_min
+        if q_max is not None:
+            bad |= q > q_max
+        np.bitwise_or(codes, QC_RANGE, out=codes, where=bad)
+
+        if max_rate is not None or spike_rate is not None:
+            #-time difference in hours, and change of the flow, with the previous record (d[i] = q[i] - q[i-1]; NaN for the first record)
+            dth = np.zeros(n)
+            dth[1:] = np.diff(t) / 3.6e12
+            d = np.empty(n)
+            d[0] = np.nan
+            np.subtract(q[1:], q[:-1], out=d[1:])
+            spike = np.zeros(n, dtype=bool)
+            if spike_rate is not None:
+                lim = spike_rate * A * dth
+                up = (d[:-1] > lim[:-1]) & (-d[1:] > lim[1:])
+                down = (-d[:-1] > lim[:-1]) & (d[1:] > lim[1:])
+                spike[:-1] = up | down
+                np.bitwise_or(codes, QC_SPIKE, out=codes, where=spike)
+            if max_rate is not None:
+                rate = np.abs(d) > max_rate * A * dth
+                #-the return from a spike is not flagged again
+                rate[1:] &= ~spike[:-1]
+                np.bitwise_or(codes, QC_RATE, out=codes, where=rate)
+
+        if flat_hours is not None:
+            #-runs of equal consecutive values; the duration of a run is the time between its first and last record
+            new = np.empty(n, dtype=bool)
+            new[0] = True
+            np.not_equal(q[1:], q[:-1], out=new[1:])
+            start = np.flatnonzero(new)
+            end = np.append(start[1:], n) - 1
+            flat = ((t[end] - t[start]) >= flat_hours * 3.6e12) & (end > start) & (q[start] != 0)
+            if flat.any():
+                np.bitwise_or(codes, QC_FLAT, out=codes, where=np.repeat(flat, end - start + 1))
+    return pd.Series(codes, index=x.index, name='QC code')
+
+def qualityMask(codes, flags=QC_ALL):
+    '''
+    Returns a boolean pandas series that is True for the records that failed any of the checks in flags (e.g. QC_SPIKE | QC_FLAT). Default
+    is all checks. The mask can be passed to 'sepBaseflow' (qc), which removes the flagged records before interpolation.
+    '''
+    return (codes & flags) != 0
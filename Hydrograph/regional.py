@@ -0,0 +1,290 @@
+# -*- coding: utf-8 -*-
+
+#-Authorship information-########################################################################################################################
+__author__ = 'Wilco Terink'
+__copyright__ = 'Wilco Terink'
+__version__ = '1.0.1'
+__email__ = 'wilco.terink@ecan.govt.nz'
+__date__ ='December 2019'
+#################################################################################################################################################
+
+#-Regional (index-flood) frequency analysis using L-moments (Hosking and Wallis 1997). The samples of all sites in a region are stored as a
+#-ragged collection: a flat numpy array with the values of all sites, and an array with offsets such that the values of site i are
+#-values[offsets[i]:offsets[i+1]]. This allows the statistics of all sites (and of all simulated regions) to be computed in bulk.
+
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+import numpy as np
+from scipy.optimize import root
+from scipy.special import gammaln, gamma
+
+def raggedSamples(samples):
+    '''
+    Converts the samples of multiple sites into a ragged collection.
+    ------------------------------------------------------------------------------------------------------------------------------------
+    Input:
+        samples:   Dictionary with the site name as key and a pandas series / numpy array with the sample (e.g. the annual maxima
+                   calculated by 'maxFlowVolStats') as value. NaNs are removed.
+    ------------------------------------------------------------------------------------------------------------------------------------
+    Returns:
+        values:    Numpy array with the values of all sites.
+        offsets:   Numpy array with the offsets of the sites in values (length is number of sites + 1).
+        names:     List with the site names.
+    '''
+    names = list(samples.keys())
+    arrays = [np.asarray(samples[s], dtype=np.float64) for s in names]
+    arrays = [a[~np.isnan(a)] for a in arrays]
+    offsets = np.concatenate([[0], np.cumsum([len(a) for a in arrays])]).astype(np.int64)
+    values = np.concatenate(arrays) if arrays else np.zeros(0)
+    return values, offsets, names
+
+def lmoments(values, offsets):
+    '''
+    Calculates the sample L-moments of each site in a ragged collection, using the unbiased probability weighted moments (Hosking and
+    Wallis 1997). All sites are computed at once.
+    ------------------------------------------------------------------------------------------------------------------------------------
+    Input:
+        values:    Numpy array with the values of all sites.
+        offsets:   Numpy array with the offsets of the sites in values (length is number of sites + 1).
+    ------------------------------------------------------------------------------------------------------------------------------------
+    Returns:
+        lmom:      Numpy array (sites x 5) with for each site the record length n, the mean l1, the L-CV t = l2 / l1, the L-skewness t3 and
+                   the L-kurtosis t4. The ratios are NaN for sites with less than 4 values.
+    '''
+    counts = np.diff(offsets)
+    S = len(counts)
+    site = np.repeat(np.arange(S), counts)
+    #-sort the values within each site
+    x = values[np.lexsort((values, site))]
+    n = counts[site].astype(np.float64)
+    j = np.arange(len(x)) - offsets[site]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        w1 = j / (n - 1)
+        w2 = w1 * (j - 1) / (n - 2)
+        w3 = w2 * (j - 2) / (n - 3)
+        b0 = np.bincount(site, weights=x, minlength=S) / counts
+        b1 = np.bincount(site, weights=w1 * x, minlength=S) / counts
+        b2 = np.bincount(site, weights=w2 * x, minlength=S) / counts
+        b3 = np.bincount(site, weights=w3 * x, minlength=S) / counts
+        l2 = 2 * b1 - b0
+        l3 = 6 * b2 - 6 * b1 + b0
+        l4 = 20 * b3 - 30 * b2 + 12 * b1 - b0
+        lmom = np.column_stack([counts, b0, l2 / b0, l3 / l2, l4 / l2])
+    lmom[counts < 4, 2:] = np.nan
+    return lmom
+
+def discordancy(lmom):
+    '''
+    Calculates the discordancy measure D of each site in a region (Hosking and Wallis 1997), based on the L-CV, L-skewness and
+    L-kurtosis of the sites. Sites with D larger than 3 (for regions with 15 or more sites) are considered discordant. Sites without L-moment
+    ratios (less than 4 values) are left out.
+    ------------------------------------------------------------------------------------------------------------------------------------
+    Input:
+        lmom:   Numpy array with the L-moments of the sites, as returned by 'lmoments'.
+    ------------------------------------------------------------------------------------------------------------------------------------
+    Returns:
+        D:      Numpy array with the discordancy of each site (NaN for the sites that are left out).
+    '''
+    u = lmom[:, 2:5]
+    valid = np.isfinite(u).all(axis=1)
+    D = np.full(len(u), np.nan)
+    d = u[valid] - u[valid].mean(axis=0)
+    A = d.T @ d
+    D[valid] = valid.sum() / 3. * np.einsum('ij,jk,ik->i', d, np.linalg.pinv(A), d)
+    return D
+
+def regionalRatios(lmom):
+    '''
+    Returns the regional average L-CV, L-skewness and L-kurtosis, being the averages of the site ratios weighted by record length. Sites
+    without L-moment ratios (less than 4 values) are left out.
+    '''
+    valid = np.isfinite(lmom[:, 2:5]).all(axis=1)
+    n = lmom[valid, 0]
+    return tuple((n[:, None] * lmom[valid, 2:5]).sum(axis=0) / n.sum())
+
+def kappaG(k, h):
+    '''
+    Returns g_1 .. g_4 of the kappa distribution (Hosking 1994), from which its L-moments are calculated.
+    '''
+    r = np.arange(1, 5)
+    if h > 0:
+        return r * np.exp(gammaln(1 + k) + gammaln(r / h) - (1 + k) * np.log(h) - gammaln(1 + k + r / h))
+    return r * np.exp(gammaln(1 + k) + gammaln(-k - r / h) - (1 + k) * np.log(-h) - gammaln(1 - r / h))
+
+def kappaRatios(k, h):
+    '''
+    Returns the L-skewness and L-kurtosis of the kappa distribution with shape parameters k and h (h = 0 is the GEV distribution).
+    '''
+    if abs(h) < 1e-6:
+        g = gamma(1 + k) * np.arange(1, 5, dtype=np.float64) ** -k
+    else:
+        g = kappaG(k, h)
+    t3 = (-g[0] + 3 * g[1] - 2 * g[2]) / (g[0] - g[1])
+    t4 = -(-g[0] + 6 * g[1] - 10 * g[2] + 5 * g[3]) / (g[0] - g[1])
+    return t3, t4
+
+def fitKappa(t, t3, t4):
+    '''
+    Fits a kappa distribution with mean 1 to the L-CV t, L-skewness t3 and L-kurtosis t4 (Hosking 1994). If no kappa distribution exists
+    for these ratios (t4 above the generalized logistic curve), the generalized logistic distribution (h = -1) is fitted to t and t3
+    instead, as recommended by Hosking and Wallis (1997).
+    ------------------------------------------------------------------------------------------------------------------------------------
+    Returns:
+        params:   Tuple (xi, alpha, k, h) with the location, scale and shape parameters.
+    '''
+    #-initial guess: GEV shape parameter from t3 (Hosking et al. 1985)
+    z = 2. / (3 + t3) - np.log(2) / np.log(3)
+    x0 = [7.8590 * z + 2.9554 * z**2, 0.]
+
+    def f(p):
+        if p[0] <= -1 or (p[1] < 0 and p[0] * p[1] <= -1):
+            return [1e3, 1e3]
+        with np.errstate(all='ignore'):
+            r = np.array(kappaRatios(p[0], p[1])) - [t3, t4]
+        return np.where(np.isfinite(r), r, 1e3)
+
+    sol = root(f, x0, method='hybr')
+    if sol.success and np.all(np.abs(f(sol.x)) < 1e-6):
+        k, h = sol.x
+    else:
+        k, h = -t3, -1.
+    if abs(k) < 1e-6:
+        k = 1e-6
+    if abs(h) < 1e-6:
+        g = gamma(1 + k) * np.arange(1, 5, dtype=np.float64) ** -k
+    else:
+        g = kappaG(k, h)
+    alpha = t * k / (g[0] - g[1])
+    xi = 1 - alpha * (1 - g[0]) / k
+    return xi, alpha, k, h
+
+def kappaQuantile(F, params):
+    '''
+    Returns the quantiles of the kappa distribution with params (xi, alpha, k, h) for non-exceedance probabilities F.
+    '''
+    xi, alpha, k, h = params
+    if abs(h) < 1e-6:
+        y = -np.log(F)
+    else:
+        y = (1 - F**h) / h
+    return xi + alpha / k * (1 - y**k)
+
+def dispersion(lmom, regions):
+    '''
+    Returns the dispersion measures V1 (L-CV) and V2 (L-CV and L-skewness) of Hosking and Wallis (1997) for each region, where the L-moments
+    of the sites of all regions are stacked in lmom (regions x sites).
+    '''
+    lmom = lmom.reshape(regions, -1, lmom.shape[1])
+    n = lmom[:, :, 0]
+    t, t3 = lmom[:, :, 2], lmom[:, :, 3]
+    tR = (n * t).sum(axis=1, keepdims=True) / n.sum(axis=1, keepdims=True)
+    t3R = (n * t3).sum(axis=1, keepdims=True) / n.sum(axis=1, keepdims=True)
+    V1 = np.sqrt((n * (t - tR)**2).sum(axis=1) / n.sum(axis=1))
+    V2 = (n * np.sqrt((t - tR)**2 + (t3 - t3R)**2)).sum(axis=1) / n.sum(axis=1)
+    return V1, V2
+
+def simulateDispersion(counts, params, nsim, seed):
+    '''
+    Simulates nsim homogeneous regions with the record lengths in counts, drawn from the kappa distribution with params, and returns
+    the dispersion measures V1 and V2 of each simulated region. All regions are simulated and analysed at once.
+    '''
+    rng = np.random.default_rng(seed)
+    N = counts.sum()
+    x = kappaQuantile(rng.random(nsim * N), params)
+    offsets = np.concatenate([[0], np.cumsum(np.tile(counts, nsim))])
+    return dispersion(lmoments(x, offsets), nsim)
+
+def heterogeneity(values, offsets, nsim=500, workers=1, seed=None, chunk=100):
+    '''
+    Calculates the heterogeneity measures H1 (based on the L-CV) and H2 (based on the L-CV and L-skewness) of a region (Hosking and Wallis
+    1997). The observed dispersion of the site L-moment ratios is compared to that of nsim simulated homogeneous regions with the same
+    record lengths, drawn from a kappa distribution fitted to the regional average L-moment ratios. The simulated regions are generated and
+    analysed in bulk (chunks of regions at once) and the chunks can be run in parallel. Sites with less than 4 values are left out.
+    A region is regarded as acceptably homogeneous if H < 1, possibly heterogeneous if 1 <= H < 2, and definitely heterogeneous if H >= 2.
+    ------------------------------------------------------------------------------------------------------------------------------------
+    Input:
+        values:    Numpy array with the values of all sites.
+        offsets:   Numpy array with the offsets of the sites in values (length is number of sites + 1).
+        nsim:      Number of simulated regions. Default is 500.
+        workers:   Number of worker processes for the simulations. Default is 1 (no parallel processing).
+        seed:      (Optional) Seed of the random number generator.
+        chunk:     Number of regions simulated at once in a chunk. Default is 100.
+    ------------------------------------------------------------------------------------------------------------------------------------
+    Returns:
+        H1:        Heterogeneity measure based on the L-CV.
+        H2:        Heterogeneity measure based on the L-CV and L-skewness.
+    '''
+    counts = np.diff(offsets)
+    valid = counts >= 4
+    lmom = lmoments(values, offsets)[valid]
+    counts = counts[valid]
+    V1, V2 = dispersion(lmom, 1)
+    params = fitKappa(*regionalRatios(lmom))
+    sizes = [min(chunk, nsim - i) for i in range(0, nsim, chunk)]
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            sims = list(pool.map(simulateDispersion, [counts] * len(sizes), [params] * len(sizes), sizes, seeds))
+    else:
+        sims = [simulateDispersion(counts, params, s, sd) for s, sd in zip(sizes, seeds)]
+    V1sim = np.concatenate([s[0] for s in sims])
+    V2sim = np.concatenate([s[1] for s in sims])
+    H1 = (V1[0] - V1sim.mean()) / V1sim.std(ddof=1)
+    H2 = (V2[0] - V2sim.mean()) / V2sim.std(ddof=1)
+    return H1, H2
+
+def growthCurve(t, t3, T):
+    '''
+    Calculates the regional growth curve, being the quantiles of a GEV distribution with mean 1, fitted to the regional L-CV t and
+    L-skewness t3 (Hosking et al. 1985). The flood quantile of a site is the growth factor multiplied by the index flood (the mean of the
+    annual maxima) of the site.
+    ------------------------------------------------------------------------------------------------------------------------------------
+    Input:
+        t:         Regional L-CV.
+        t3:        Regional L-skewness.
+        T:         Numpy array with return periods in years.
+    ------------------------------------------------------------------------------------------------------------------------------------
+    Returns:
+        growth:    Numpy array with the growth factor for each return period.
+    '''
+    z = 2. / (3 + t3) - np.log(2) / np.log(3)
+    k = 7.8590 * z + 2.9554 * z**2
+    alpha = t * k / ((1 - 2.**-k) * gamma(1 + k))
+    xi = 1 - alpha * (1 - gamma(1 + k)) / k
+    F = 1 - 1. / np.asarray(T, dtype=np.float64)
+    return xi + alpha / k * (1 - (-np.log(F))**k)
+
+def regionalFrequency(samples, T, nsim=500, workers=1, seed=None):
+    '''
+    Regional (index-flood) frequency analysis of the annual maxima of multiple sites using L-moments (Hosking and Wallis 1997). Sites with
+    less than 4 values have no L-moment ratios and are left out of the discordancy, the regional averages and the heterogeneity measures,
+    but their quantiles are still calculated from the regional growth curve and their mean (index flood).
+    ------------------------------------------------------------------------------------------------------------------------------------
+    Input:
+        samples:   Dictionary with the site name as key and a pandas series / numpy array with the annual maxima as value (e.g. the
+                   'Total runoff interp. [m^3 s^-1]' or 'Flow volume [MCM]' column of the output of 'maxFlowVolStats').
+        T:         List with return periods in years for which the growth curve and site quantiles are calculated.
+        nsim:      Number of simulated regions for the heterogeneity measures. Default is 500.
+        workers:   Number of worker processes for the simulations. Default is 1.
+        seed:      (Optional) Seed of the random number generator.
+    ------------------------------------------------------------------------------------------------------------------------------------
+    Returns:
+        df_sites:  Pandas dataframe with the site name as index and the columns 'n', 'Mean', 'L-CV', 'L-skewness', 'L-kurtosis',
+                   'Discordancy' and the quantile for each return period ('Q<T>'). The L-moment ratios and discordancy are NaN for the
+                   sites that are left out.
+        region:    Dictionary with the regional 'L-CV', 'L-skewness', 'L-kurtosis', the heterogeneity measures 'H1' and 'H2', and the
+                   'Growth curve' (pandas series with the growth factor for each return period).
+    '''
+    values, offsets, names = raggedSamples(samples)
+    lmom = lmoments(values, offsets)
+    df_sites = pd.DataFrame(lmom, index=names, columns=['n', 'Mean', 'L-CV', 'L-skewness', 'L-kurtosis'])
+    df_sites['n'] = df_sites['n'].astype(int)
+    df_sites['Discordancy'] = discordancy(lmom)
+    t, t3, t4 = regionalRatios(lmom)
+    H1, H2 = heterogeneity(values, offsets, nsim, workers, seed)
+    growth = pd.Series(growthCurve(t, t3, T), index=pd.Index(T, name='T [year]'), name='Growth factor')
+    for Ti, g in growth.items():
+        df_sites['Q%g' %Ti] = df_sites['Mean'] * g
+    region = {'L-CV': t, 'L-skewness': t3, 'L-kurtosis': t4, 'H1': H1, 'H2': H2, 'Growth curve': growth}
+    return df_sites, region
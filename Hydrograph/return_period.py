@@ -0,0 +1,84 @@
+# -*- coding: utf-8 -*-
+
+#-Authorship information-########################################################################################################################
+__author__ = 'Wilco Terink'
+__copyright__ = 'Wilco Terink'
+__version__ = '1.0.1'
+__email__ = 'wilco.terink@ecan.govt.nz'
+__date__ ='December 2019'
+#################################################################################################################################################
+
+#-Return period lookup tables for real-time event classification. The tables are built once from the GEV parameters returned by 'fitGEV',
+#-and the lookups only require numpy, so they can be used without importing scipy.
+
+import numpy as np
+
+#-Variables in a lookup table, and the keys of their columns in the table
+VARIABLES = {'flow': 'Total runoff interp. [m^3 s^-1]', 'volume': 'Flow volume [MCM]'}
+
+def gevQuantile(T, gevfit):
+    '''
+    Returns the quantiles of a GEV distribution for return periods T (in years). gevfit is a tuple with the shape, location and scale
+    parameters, as returned by 'fitGEV' (same shape convention as scipy.stats.genextreme).
+    '''
+    c, loc, scale = gevfit
+    y = -np.log(1 - 1. / np.asarray(T, dtype=np.float64))
+    if abs(c) < 1e-12:
+        return loc - scale * np.log(y)
+    return loc + scale * (1 - y**c) / c
+
+def returnPeriodTable(flow_fit, volume_fit, Tmin=1.01, Tmax=10000, n=256):
+    '''
+    Creates a lookup table with the peak flow and flow volume for return periods on a logarithmic grid.
+    ------------------------------------------------------------------------------------------------------------------------------------
+    Input:
+        flow_fit:     Tuple with the GEV parameters fitted to the annual maximum peak flows (see 'fitGEV').
+        volume_fit:   Tuple with the GEV parameters fitted to the annual maximum flow volumes (see 'fitGEV').
+        Tmin:         Smallest return period in years in the table. Default is 1.01.
+        Tmax:         Largest return period in years in the table. Default is 10000.
+        n:            Number of return periods in the table. Default is 256.
+    ------------------------------------------------------------------------------------------------------------------------------------
+    Returns:
+        table:        Dictionary with numpy arrays 'T [year]', 'Total runoff interp. [m^3 s^-1]' and 'Flow volume [MCM]', and the GEV
+                      parameters of the peak flow ('flow_fit') and flow volume ('volume_fit').
+    '''
+    T = np.geomspace(Tmin, Tmax, n)
+    return {'T [year]': T,
+            VARIABLES['flow']: gevQuantile(T, flow_fit), VARIABLES['volume']: gevQuantile(T, volume_fit),
+            'flow_fit': np.asarray(flow_fit, dtype=np.float64), 'volume_fit': np.asarray(volume_fit, dtype=np.float64)}
+
+def saveReturnPeriodTable(fname, table):
+    '''
+    Saves a lookup table (see 'returnPeriodTable') of a site to fname in numpy *.npz format.
+    '''
+    np.savez(fname, **table)
+
+def loadReturnPeriodTable(fname):
+    '''
+    Loads a lookup table of a site that was saved with 'saveReturnPeriodTable'. Returns a dictionary with numpy arrays.
+    '''
+    with np.load(fname) as f:
+        return {k: f[k] for k in f.files}
+
+def lookupReturnPeriod(values, table, variable='flow'):
+    '''
+    Returns the return periods of event peak flows or flow volumes, by interpolation in a lookup table (linear in the logarithm of the
+    return period). All values are classified at once. Values outside the table are set to the smallest or largest return period in the
+    table.
+    ------------------------------------------------------------------------------------------------------------------------------------
+    Input:
+        values:     Scalar or numpy array with the peak flows (cumecs) or flow volumes (MCM).
+        table:      Lookup table of the site (see 'returnPeriodTable' and 'loadReturnPeriodTable').
+        variable:   'flow' for peak flows or 'volume' for flow volumes. Default is 'flow'.
+    ------------------------------------------------------------------------------------------------------------------------------------
+    Returns:
+        T:          Numpy array with the return period in years of each value.
+    '''
+    return np.exp(np.interp(values, table[VARIABLES[variable]], np.log(table['T [year]'])))
+
+def lookupQuantile(T, table, variable='flow'):
+    '''
+    Returns the peak flows or flow volumes for return periods T (in years), by interpolation in a lookup table (linear in the logarithm of
+    the return period). Return periods outside the table are set to the smallest or largest return period in the table.
+    '''
+    return np.interp(np.log(T), np.log(table['T [year]']), table[VARIABLES[variable]])
@@ -0,0 +1,58 @@
+# -*- coding: utf-8 -*-
+
+#-Authorship information-########################################################################################################################
+__author__ = 'Wilco Terink'
+__copyright__ = 'Wilco Terink'
+__version__ = '1.0.1'
+__email__ = 'wilco.terink@ecan.govt.nz'
+__date__ ='December 2019'
+#################################################################################################################################################
+
+from Hydrograph.hydrograph import compactOutput
+import pandas as pd
+import numpy as np
+
+#-Memory benchmark of the compact output of sepBaseflow for a 10-million-row record (approx. 95 years of 5-minute data). Running sepBaseflow
+#-itself on such a record takes too long for a benchmark, so a dataframe with the same columns and dtypes is synthesized instead.
+
+n = 10000000
+rng = np.random.default_rng(1)
+
+dr = pd.date_range('1-1-1925 00:00:00', periods=n, freq='5T')
+q = 20. + 400. * rng.random(n) ** 8
+qb = np.minimum(q, 20. + 5. * rng.random(n))
+#-events of 1000 records with a gap of 1000 records between them
+peak = np.where((np.arange(n) // 1000) % 2 == 0, np.arange(n) // 2000 + 1., np.nan)
+ev_start = pd.Series(dr[(np.arange(n) // 2000) * 2000]).where(~np.isnan(peak)).to_numpy()
+
+df = pd.DataFrame(index=dr)
+df.index.name = 'Date'
+df['dt [hour]'] = 5. / 60
+df['Total runoff [m^3 s^-1]'] = q
+df['Total runoff interp. [m^3 s^-1]'] = q
+df['Baseflow [m^3 s^-1]'] = qb
+df['Peakflow [m^3 s^-1]'] = q - qb
+df['Peak nr.'] = peak
+df['Peakflow starts'] = ev_start
+df['Peakflow ends'] = ev_start + np.timedelta64(999 * 5, 'm')
+df['Flow volume [m^3]'] = np.where(np.isnan(peak), np.nan, q * 3600 * 5. / 60)
+df['Max. flow [m^3 s^-1]'] = np.where(np.isnan(peak), np.nan, 420.)
+df['Date max. flow'] = ev_start + np.timedelta64(100 * 5, 'm')
+df['Tp [hour]'] = np.where(np.isnan(peak), np.nan, 100 * 5. / 60)
+q = None; qb = None; peak = None; ev_start = None
+
+mem_full = df.memory_usage(deep=True).sum() / 1024**2
+print('Full precision output:       %8.1f MB' %mem_full)
+
+df_compact = compactOutput(df)
+mem_compact = df_compact.memory_usage(deep=True).sum() / 1024**2
+print('Compact output:              %8.1f MB (%.1f%% reduction)' %(mem_compact, 100 * (1 - mem_compact / mem_full)))
+
+df_compact.drop('Total runoff [m^3 s^-1]', axis=1, inplace=True)
+mem_compact = df_compact.memory_usage(deep=True).sum() / 1024**2
+print('Compact output, raw dropped: %8.1f MB (%.1f%% reduction)' %(mem_compact, 100 * (1 - mem_compact / mem_full)))
+
+#-Check the accuracy guarantee
+c = 'Total runoff interp. [m^3 s^-1]'
+rel_err = np.abs(df_compact[c].to_numpy(np.float64) - df[c].to_numpy()) / df[c].to_numpy()
+print('Max. relative flow error:     %.2e (guaranteed <= %.2e)' %(rel_err.max(), 2.**-24))
@@ -22,6 +22,7 @@ for i in range(len(colors)):
 
 from Hydrograph.hydrograph import sepBaseflow, maxFlowVolStats
 from Hydrograph.extreme_analysis import *
+from Hydrograph.plotting import plotHydrograph
 import pandas as pd
 import numpy as np
 
@@ -58,7 +59,10 @@ k = 0.000546  #-m^3 s^-1 km^-2 h^-1
 # df.to_csv(r'C:\Active\Projects\Rangitata_flood\data\test.csv')
 df = pd.read_csv(r'C:\Active\Projects\Rangitata_flood\data\Rangitata_Klondyke_Peaks.csv',parse_dates=[0], index_col=0, dayfirst=True)
 
-# #-Plot recorded flow and interpolated recorded flow  
+# #-Plot recorded flow and interpolated recorded flow (decimated, so this is also fast for decades of 5-minute data)
+# plotHydrograph(df, labels=['Runoff', 'Runoff interpolated'], Title='Rangitata at Klondyke')
+# 
+# #-Or without decimation
 # fig, ax = plt.subplots()
 # lines = plt.plot(df.index, df['Total runoff [m^3 s^-1]'], df.index, df['Total runoff interp. [m^3 s^-1]'])
 # plt.xlabel('Date')
@@ -70,6 +74,7 @@ df = pd.read_csv(r'C:\Active\Projects\Rangitata_flood\data\Rangitata_Klondyke_Pe
 # plt.show()
 # 
 # #-Plot the baseflow and peakflow as stacked
+# plotHydrograph(df, labels=['Baseflow', 'Peakflow'], stacked=True, Title='Rangitata at Klondyke')
 # df1 = df.loc[(df.index>=pd.Timestamp('2019-11-01'))&(df.index<=pd.Timestamp('2019-12-31'))]
 # fig, ax = plt.subplots()
 # lines = plt.plot(df1.index, df1['Baseflow [m^3 s^-1]'], df1.index, df1['Peakflow [m^3 s^-1]'] +  df1['Baseflow [m^3 s^-1]'])
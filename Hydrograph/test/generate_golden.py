@@ -0,0 +1,59 @@
+# -*- coding: utf-8 -*-
+
+#-Authorship information-########################################################################################################################
+__author__ = 'Wilco Terink'
+__copyright__ = 'Wilco Terink'
+__version__ = '1.0.1'
+__email__ = 'wilco.terink@ecan.govt.nz'
+__date__ ='December 2019'
+#################################################################################################################################################
+
+#-Creates the golden outputs and baseline timings of the regression tests (test_regression.py) from the current implementations. Only run
+#-this when a change of the outputs is intended, or to record the baseline timings on the machine that runs the tests:
+#
+#   python Hydrograph/test/generate_golden.py                  (golden outputs and timings)
+#   python Hydrograph/test/generate_golden.py --timings-only   (timings only)
+
+import argparse
+import json
+import os
+import platform
+
+import pandas as pd
+import numpy as np
+import scipy
+
+from regression_cases import (GOLDEN_DIR, TIMINGS_FILE, SEPARATION_CASES, runSeparation, runFilterpeaks, runStats, runGEV, annualMaxima,
+                              writeGolden, readGolden, bestTime, perfRuns)
+
+def generateGolden():
+    os.makedirs(GOLDEN_DIR, exist_ok=True)
+    for case in SEPARATION_CASES:
+        print('sepBaseflow: %s' %case)
+        writeGolden(runSeparation(case), case + '_peaks')
+    print('filterpeaks')
+    writeGolden(runFilterpeaks(), 'filterpeaks')
+    print('maxFlowVolStats')
+    writeGolden(runStats(readGolden('multi_year_peaks')), 'multi_year_stats', index=False)
+    print('fitGEV')
+    writeGolden(annualMaxima().to_frame(), 'annual_maxima', index=False)
+    writeGolden(runGEV(annualMaxima()), 'annual_maxima_gev', index=False)
+
+def generateTimings(repeats):
+    timings = {'python': platform.python_version(), 'numpy': np.__version__, 'pandas': pd.__version__, 'scipy': scipy.__version__,
+               'machine': platform.machine(), 'runs': {}}
+    for name, (f, n) in perfRuns().items():
+        t = bestTime(f, repeats)
+        print('%s: %d records in %.4f s (%.0f records/s)' %(name, n, t, n / t))
+        timings['runs'][name] = {'records': n, 'seconds': t, 'records per second': n / t}
+    with open(TIMINGS_FILE, 'w') as f:
+        json.dump(timings, f, indent=4)
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Create the golden outputs and baseline timings of the regression tests.')
+    parser.add_argument('--timings-only', action='store_true', help='Only record the baseline timings.')
+    parser.add_argument('--repeats', type=int, default=3, help='Number of timed runs; the fastest is recorded (default: 3).')
+    args = parser.parse_args()
+    if not args.timings_only:
+        generateGolden()
+    generateTimings(args.repeats)
@@ -0,0 +1,274 @@
+# -*- coding: utf-8 -*-
+
+#-Authorship information-########################################################################################################################
+__author__ = 'Wilco Terink'
+__copyright__ = 'Wilco Terink'
+__version__ = '1.0.1'
+__email__ = 'wilco.terink@ecan.govt.nz'
+__date__ ='December 2019'
+#################################################################################################################################################
+
+#-Synthetic and edge-case series for the golden-output regression tests (test_regression.py). The golden outputs in the 'golden' folder are
+#-created with generate_golden.py from the implementations at the time of generation. All series are generated with a fixed seed, so they
+#-are the same on every run.
+
+import contextlib
+import io
+import os
+import time
+
+import pandas as pd
+import numpy as np
+
+from Hydrograph.hydrograph import sepBaseflow, filterpeaks, maxFlowVolStats
+from Hydrograph.extreme_analysis import fitGEV
+from Hydrograph.batch import sepBaseflowBatch
+from Hydrograph.quality import qualityCodes, qualityMask
+
+GOLDEN_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'golden')
+TIMINGS_FILE = os.path.join(GOLDEN_DIR, 'timings.json')
+
+#-Columns of the sepBaseflow output with timestamps
+DATE_COLUMNS = ['Peakflow starts', 'Peakflow ends', 'Date max. flow']
+
+def storms(n, dt, seed, centres=None, nstorms=None, base=20.):
+    '''
+    Returns a numpy array with n flow records at a dt-minute interval: a slowly varying baseflow with storm hydrographs (fast rise and
+    exponential recession) at the given centres (in hours), or at nstorms random times.
+    '''
+    rng = np.random.default_rng(seed)
+    t = np.arange(n) * dt / 60.
+    q = base + 2. * np.sin(t / 50.)
+    if centres is None:
+        centres = np.sort(rng.uniform(0, t[-1], nstorms))
+    for c in centres:
+        peak = rng.uniform(50, 400)
+        rise = rng.uniform(2, 6)
+        fall = rng.uniform(6, 24)
+        q += np.where(t < c, peak * np.exp(-(np.minimum(t - c, 0) / rise)**2), peak * np.exp(-np.maximum(t - c, 0) / fall))
+    return q
+
+def frame(q, dt, start='2000-01-01'):
+    '''
+    Returns a dataframe as input for 'sepBaseflow' with flows q at a dt-minute interval.
+    '''
+    dr = pd.date_range(start, periods=len(q), freq='%dT' %dt, name='Date')
+    return pd.DataFrame({'Total runoff [m^3 s^-1]': q}, index=dr)
+
+def caseStorms():
+    return frame(storms(30 * 96, 15, 1, nstorms=8), 15)
+
+def caseGaps():
+    #-single missing records, gaps of 2-3 records within events (these events are removed by filterpeaks) and missing timestamps
+    x = frame(storms(30 * 96, 15, 2, nstorms=8), 15)
+    q = x['Total runoff [m^3 s^-1]']
+    q.iloc[[50, 300, 301, 900, 1500]] = np.nan
+    peaks = np.flatnonzero((q.values[1:-1] > q.values[:-2]) & (q.values[1:-1] > q.values[2:])) + 1
+    for p in peaks[::3]:
+        q.iloc[p + 2:p + 5] = np.nan
+    return x.drop(x.index[2000:2010])
+
+def caseLongGap():
+    #-a gap of 2 days during an event, of which only dt_max hours are interpolated
+    x = frame(storms(30 * 96, 15, 3, centres=[100, 300, 320, 500]), 15)
+    x.iloc[300 * 4 + 8:348 * 4, 0] = np.nan
+    return x
+
+def caseFlat():
+    #-flat-lined sensor (constant flow for a day), a period with zero flow and a step change
+    q = storms(30 * 96, 15, 4, nstorms=6)
+    q[500:596] = q[500]
+    q[1200:1400] = 0.
+    q[2000:] += 30.
+    return frame(q, 15)
+
+def caseBackToBack():
+    #-events that start before the recession of the previous event has ended
+    return frame(storms(20 * 96, 15, 5, centres=[40, 48, 55, 64, 150, 158, 300, 306, 312]), 15)
+
+def caseFiveMinute():
+    x = frame(storms(5 * 288, 5, 6, nstorms=3), 5)
+    x.iloc[700:705, 0] = np.nan
+    return x
+
+def caseQC():
+    #-spikes, a drop-out to zero, a negative value and a flat-lined sensor, to be removed by the quality control
+    x = frame(storms(30 * 96, 15, 10, nstorms=8), 15)
+    q = x['Total runoff [m^3 s^-1]']
+    q.iloc[[200, 900, 1700]] += 300.
+    q.iloc[1100] = 0.
+    q.iloc[2300] = -5.
+    q.iloc[2500:2600] = q.iloc[2500]
+    return x
+
+def caseMultiYear():
+    #-three years of hourly data, so that there are annual maxima for 'maxFlowVolStats'
+    x = frame(storms(3 * 8760, 60, 7, nstorms=60), 60)
+    x.iloc[10000:10030, 0] = np.nan
+    return x
+
+#-Cases for 'sepBaseflow': (function returning the input, keyword arguments of sepBaseflow). The 'qc' argument is given as the keyword
+#-arguments of 'qualityCodes', and the resulting mask is passed to sepBaseflow.
+SEPARATION_CASES = {
+    'storms':          (caseStorms, dict(dt=15, A=1461, dt_max=12, tp_min=6)),
+    'storms_steep':    (caseStorms, dict(dt=15, A=1461, k=0.002, tp_min=24)),
+    'storms_compact':  (caseStorms, dict(dt=15, A=1461, dt_max=12, tp_min=6, compact=True)),
+    'gaps':            (caseGaps, dict(dt=15, A=1461, dt_max=12, tp_min=6)),
+    'long_gap':        (caseLongGap, dict(dt=15, A=1461, dt_max=12, tp_min=6)),
+    'flat':            (caseFlat, dict(dt=15, A=1461, dt_max=12, tp_min=6)),
+    'back_to_back':    (caseBackToBack, dict(dt=15, A=1461, dt_max=12, tp_min=6)),
+    'five_minute':     (caseFiveMinute, dict(dt=5, A=500, dt_max=1, tp_min=2)),
+    'multi_year':      (caseMultiYear, dict(dt=60, A=1461, dt_max=12, tp_min=6)),
+    'qc':              (caseQC, dict(dt=15, A=1461, dt_max=12, tp_min=6, qc=dict(q_max=2000., spike_rate=0.04, flat_hours=12))),
+    'lyne_hollick':    (caseGaps, dict(dt=15, A=1461, dt_max=12, tp_min=6, method='lyne-hollick')),
+    'eckhardt':        (caseGaps, dict(dt=15, A=1461, dt_max=12, tp_min=6, method='eckhardt')),
+}
+
+#-Separation cases for which 'sepBaseflowBatch' is compared with 'sepBaseflow'
+BATCH_CASES = ['gaps', 'flat', 'back_to_back']
+
+def runBatch(case):
+    '''
+    Runs 'sepBaseflowBatch' for two sites: the input of a separation case, and a copy scaled by 0.4 with a smaller catchment area and a
+    different k. Returns the output of 'sepBaseflowBatch' and the output of 'sepBaseflow' for the scaled copy.
+    '''
+    make, kwargs = SEPARATION_CASES[case]
+    kwargs = dict(kwargs)
+    dt = kwargs.pop('dt')
+    A = kwargs.pop('A')
+    x = make()
+    small = x * 0.4
+    wide = pd.DataFrame({case: x['Total runoff [m^3 s^-1]'], case + '_small': small['Total runoff [m^3 s^-1]']})
+    with contextlib.redirect_stdout(io.StringIO()):
+        batch = sepBaseflowBatch(wide, dt, {case: A, case + '_small': 500}, k={case: 0.000546, case + '_small': 0.001}, **kwargs)
+        site = sepBaseflow(small, dt, 500, k=0.001, **kwargs)
+    return batch, site
+
+def filterpeaksInput():
+    '''
+    Returns the input for 'filterpeaks': peakflow with events of different durations, missing records within events and zero flow between
+    events.
+    '''
+    rng = np.random.default_rng(8)
+    n = 4000
+    pf = np.zeros(n)
+    i = 5
+    while i < n - 100:
+        d = rng.integers(1, 60)
+        pf[i:i + d] = rng.uniform(1, 100, d)
+        i += d + rng.integers(1, 30)
+    pf[rng.choice(n, 200, replace=False)] = np.nan
+    x = frame(pf, 15).rename(columns={'Total runoff [m^3 s^-1]': 'Peakflow [m^3 s^-1]'})
+    x.insert(0, 'dt [hour]', 0.25)
+    x.iloc[0, 0] = 0.
+    return x
+
+def annualMaxima():
+    '''
+    Returns 40 synthetic annual maxima for 'fitGEV'.
+    '''
+    rng = np.random.default_rng(9)
+    #-GEV random numbers (shape c = -0.1) from the inverse CDF
+    u = rng.random(40)
+    c = -0.1
+    return pd.Series(800. + 250. * (1 - (-np.log(u))**c) / c, name='Total runoff interp. [m^3 s^-1]')
+
+#-Return periods at which the inverse CDF of 'fitGEV' is compared
+GEV_TMAX = 100
+
+def runSeparation(case):
+    '''
+    Runs 'sepBaseflow' for a separation case and returns the output.
+    '''
+    make, kwargs = SEPARATION_CASES[case]
+    kwargs = dict(kwargs)
+    dt = kwargs.pop('dt')
+    A = kwargs.pop('A')
+    x = make()
+    if 'qc' in kwargs:
+        kwargs['qc'] = qualityMask(qualityCodes(x, A, **kwargs['qc']))
+    with contextlib.redirect_stdout(io.StringIO()):
+        return sepBaseflow(x, dt, A, **kwargs)
+
+def runFilterpeaks():
+    '''
+    Runs 'filterpeaks' on the output of 'filterpeaksInput' and returns the output.
+    '''
+    with contextlib.redirect_stdout(io.StringIO()):
+        return filterpeaks(filterpeaksInput(), 6)
+
+def runStats(peaks):
+    '''
+    Runs 'maxFlowVolStats' on the output of 'sepBaseflow' (peaks) and returns the annual maxima.
+    '''
+    return maxFlowVolStats(peaks)
+
+def runGEV(x):
+    '''
+    Runs 'fitGEV' and returns a dataframe with the fitted parameters and a subsample of the inverse CDF.
+    '''
+    gev_fit, gev_inv = fitGEV(x.sort_values(), GEV_TMAX)
+    T = np.linspace(1, GEV_TMAX, 100000)
+    sel = np.arange(1000, len(T), 1000)
+    df = pd.DataFrame({'T [year]': T[sel], 'Inverse CDF': gev_inv[sel]})
+    df['Shape'] = gev_fit[0]
+    df['Location'] = gev_fit[1]
+    df['Scale'] = gev_fit[2]
+    return df
+
+def goldenFile(name):
+    '''
+    Returns the path of the golden output name.
+    '''
+    return os.path.join(GOLDEN_DIR, name + '.csv')
+
+def writeGolden(df, name, index=True):
+    '''
+    Writes dataframe df as golden output name.
+    '''
+    df.to_csv(goldenFile(name), index=index)
+
+def readGolden(name, index=True):
+    '''
+    Reads a golden output, with the timestamps parsed and the floats read without loss of precision.
+    '''
+    df = pd.read_csv(goldenFile(name), index_col=0 if index else None, float_precision='round_trip')
+    if index:
+        df.index = pd.to_datetime(df.index)
+        df.index.name = 'Date'
+    for c in DATE_COLUMNS:
+        if c in df.columns:
+            df[c] = pd.to_datetime(df[c])
+    return df
+
+def bestTime(f, repeats=3):
+    '''
+    Returns the shortest time in seconds of repeats calls to f.
+    '''
+    best = np.inf
+    for i in range(repeats):
+        t0 = time.perf_counter()
+        f()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+def perfRuns():
+    '''
+    Returns a dictionary with the timed runs of the performance regression tests: the name as key and a tuple with the function to time and
+    the number of records it processes as value.
+    '''
+    x = caseStorms()
+    fp = filterpeaksInput()
+    peaks = readGolden('multi_year_peaks')
+    am = annualMaxima()
+    quiet = contextlib.redirect_stdout
+    def sep():
+        with quiet(io.StringIO()):
+            sepBaseflow(x, 15, 1461, dt_max=12, tp_min=6)
+    def fpk():
+        with quiet(io.StringIO()):
+            filterpeaks(fp, 6)
+    return {'sepBaseflow': (sep, len(x)),
+            'filterpeaks': (fpk, len(fp)),
+            'maxFlowVolStats': (lambda: maxFlowVolStats(peaks), len(peaks)),
+            'fitGEV': (lambda: fitGEV(am.sort_values(), GEV_TMAX), len(am))}
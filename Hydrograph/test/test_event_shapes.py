@@ -0,0 +1,29 @@
+# -*- coding: utf-8 -*-
+
+#-Authorship information-########################################################################################################################
+__author__ = 'Wilco Terink'
+__copyright__ = 'Wilco Terink'
+__version__ = '1.0.1'
+__email__ = 'wilco.terink@ecan.govt.nz'
+__date__ ='December 2019'
+#################################################################################################################################################
+
+#-Tests of the event shape library (Hydrograph.event_shapes) on the full and compact output of sepBaseflow.
+#
+#   python -m pytest Hydrograph/test/test_event_shapes.py
+
+import numpy as np
+
+from Hydrograph.event_shapes import eventShapes, nearestShapes
+from regression_cases import readGolden, runSeparation
+
+def test_compact():
+    full = eventShapes(readGolden('storms_peaks'), 'storms')
+    compact = eventShapes(runSeparation('storms_compact'), 'storms')
+    assert len(full['shapes']) == len(compact['shapes']) > 0
+    for c in ['site', 'Peak nr.', 'Peakflow starts', 'Tp [hour]']:
+        np.testing.assert_array_equal(compact[c], full[c])
+    #-the flows of the compact output are float32, so the shapes agree at float32 precision
+    np.testing.assert_allclose(compact['shapes'], full['shapes'], rtol=1e-5, atol=1e-6)
+    rows, distance = nearestShapes(full, compact['shapes'], k=1)
+    np.testing.assert_array_equal(rows[:, 0], np.arange(len(full['shapes'])))
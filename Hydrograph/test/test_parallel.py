@@ -0,0 +1,65 @@
+# -*- coding: utf-8 -*-
+
+#-Authorship information-########################################################################################################################
+__author__ = 'Wilco Terink'
+__copyright__ = 'Wilco Terink'
+__version__ = '1.0.1'
+__email__ = 'wilco.terink@ecan.govt.nz'
+__date__ ='December 2019'
+#################################################################################################################################################
+
+#-Tests of the shared-memory parallel separation (Hydrograph.parallel): the output of sharedSepBaseflow is compared with the golden outputs of
+#-sepBaseflow, and a result that is kept after leaving the with-block must give a warning instead of a dangling array.
+#
+#   python -m pytest Hydrograph/test/test_parallel.py
+
+import ctypes
+import gc
+
+import pytest
+
+pytest.importorskip('multiprocessing.shared_memory', reason='sharedSepBaseflow requires Python 3.8 or newer')
+
+from Hydrograph.parallel import sharedSepBaseflow
+from regression_cases import SEPARATION_CASES, readGolden
+from test_regression import assertFrameClose
+
+CASES = ['storms', 'gaps']
+
+def sharedMemory(a):
+    '''
+    Returns True if numpy array a is a view on a shared memory block (see 'arrayViews').
+    '''
+    while getattr(a, 'base', None) is not None:
+        a = a.base
+    return isinstance(a, ctypes.Array)
+
+def test_sharedSepBaseflow():
+    #-The storms and gaps cases are separated with the same arguments
+    kwargs = dict(SEPARATION_CASES[CASES[0]][1])
+    assert all(SEPARATION_CASES[case][1] == kwargs for case in CASES)
+    dt = kwargs.pop('dt')
+    A = kwargs.pop('A')
+    sites = {case: SEPARATION_CASES[case][0]() for case in CASES}
+    with sharedSepBaseflow(sites, dt, A, workers=2, **kwargs) as results:
+        assert list(results) == CASES
+        for case in CASES:
+            golden = readGolden(case + '_peaks')
+            df = results[case]
+            assert all(sharedMemory(df[c].to_numpy()) for c in df.columns if df[c].dtype.kind == 'f')
+            assertFrameClose(df[golden.columns], golden)
+        df = None
+        golden = None
+
+def test_sharedSepBaseflowKeptResult():
+    kwargs = dict(SEPARATION_CASES['gaps'][1])
+    dt = kwargs.pop('dt')
+    A = kwargs.pop('A')
+    x = SEPARATION_CASES['gaps'][0]()
+    with pytest.warns(UserWarning, match='still referenced after leaving sharedSepBaseflow'):
+        with sharedSepBaseflow({'gaps': x}, dt, A, workers=1, **kwargs) as results:
+            kept = results['gaps']
+    #-The kept result remains readable, as the block is only closed once it is no longer referenced
+    assertFrameClose(kept[readGolden('gaps_peaks').columns], readGolden('gaps_peaks'))
+    kept = None
+    gc.collect()
@@ -0,0 +1,92 @@
+# -*- coding: utf-8 -*-
+
+#-Authorship information-########################################################################################################################
+__author__ = 'Wilco Terink'
+__copyright__ = 'Wilco Terink'
+__version__ = '1.0.1'
+__email__ = 'wilco.terink@ecan.govt.nz'
+__date__ ='December 2019'
+#################################################################################################################################################
+
+#-Tests of the pipelined runner (Hydrograph.pipeline) with trivial read, compute and write functions: the results, the propagation of an
+#-error in each stage, and the backpressure of the bounded queues.
+#
+#   python -m pytest Hydrograph/test/test_pipeline.py
+
+import threading
+import time
+
+import pytest
+
+from Hydrograph.pipeline import runPipeline
+
+#-The compute functions run in worker processes, so they are module level functions
+def square(x):
+    return x * x
+
+def failOn3(x):
+    if x == 3:
+        raise ValueError('compute failed on 3')
+    return x * x
+
+def read(item):
+    return (item,)
+
+def write(item, result):
+    return result
+
+@pytest.mark.parametrize('workers', [1, 3])
+def test_results(workers):
+    written = runPipeline(list(range(20)), read, square, write, workers)
+    assert written == {i: i * i for i in range(20)}
+
+def test_empty():
+    assert runPipeline([], read, square, write, 2) == {}
+
+def test_read_error():
+    def failingRead(item):
+        if item == 5:
+            raise IOError('read failed on 5')
+        return (item,)
+    with pytest.raises(IOError, match='read failed on 5'):
+        runPipeline(list(range(20)), failingRead, square, write, 2)
+
+def test_compute_error():
+    with pytest.raises(ValueError, match='compute failed on 3'):
+        runPipeline(list(range(20)), read, failOn3, write, 2)
+
+def test_write_error():
+    def failingWrite(item, result):
+        if item == 7:
+            raise RuntimeError('write failed on 7')
+        return result
+    with pytest.raises(RuntimeError, match='write failed on 7'):
+        runPipeline(list(range(20)), read, square, failingWrite, 2)
+
+def test_backpressure():
+    #-the writer blocks on the first result, so the reader can only read ahead until the bounded queues are full
+    n = 50
+    workers = 1
+    queue_size = 2
+    read_items = []
+    release = threading.Event()
+    out = {}
+
+    def countingRead(item):
+        read_items.append(item)
+        return (item,)
+
+    def blockingWrite(item, result):
+        release.wait()
+        return result
+
+    t = threading.Thread(target=lambda: out.update(runPipeline(list(range(n)), countingRead, square, blockingWrite, workers, queue_size)))
+    t.start()
+    time.sleep(1.)
+    ahead = len(read_items)
+    release.set()
+    t.join()
+    #-items in the read queue, being computed, in the write queue, being written, and one item of the reader and compute stage each waiting
+    #-for a free slot
+    assert ahead <= 2 * queue_size + workers + 3
+    assert out == {i: i * i for i in range(n)}
@@ -0,0 +1,48 @@
+# -*- coding: utf-8 -*-
+
+#-Authorship information-########################################################################################################################
+__author__ = 'Wilco Terink'
+__copyright__ = 'Wilco Terink'
+__version__ = '1.0.1'
+__email__ = 'wilco.terink@ecan.govt.nz'
+__date__ ='December 2019'
+#################################################################################################################################################
+
+#-Tests of the regional frequency analysis (Hydrograph.regional) for regions with short-record sites.
+#
+#   python -m pytest Hydrograph/test/test_regional.py
+
+import numpy as np
+
+from Hydrograph.regional import regionalFrequency
+
+T = [2, 10, 100]
+
+def region():
+    '''
+    Returns the annual maxima of a homogeneous region of 10 sites (GEV distributed, record lengths of 20 to 50 years).
+    '''
+    rng = np.random.default_rng(1)
+    c = -0.1
+    samples = {}
+    for i, n in enumerate(rng.integers(20, 50, 10)):
+        u = rng.random(n)
+        samples['site%d' %i] = 100. + 30. * (1 - (-np.log(u))**c) / c
+    return samples
+
+def test_short_site():
+    samples = region()
+    df, reg = regionalFrequency(samples, T, nsim=100, seed=0)
+    samples['short'] = np.array([120., 150., 90.])
+    df_short, reg_short = regionalFrequency(samples, T, nsim=100, seed=0)
+    #-the short site is left out of the regional analysis, so the regional results and the other sites are unchanged
+    for k in ['L-CV', 'L-skewness', 'L-kurtosis', 'H1', 'H2']:
+        assert np.isfinite(reg_short[k])
+        assert reg_short[k] == reg[k]
+    np.testing.assert_array_equal(reg_short['Growth curve'].to_numpy(), reg['Growth curve'].to_numpy())
+    np.testing.assert_array_equal(df_short.loc[df.index].to_numpy(), df.to_numpy())
+    #-the short site has no L-moment ratios and discordancy, but its quantiles follow from the growth curve and its mean
+    short = df_short.loc['short']
+    assert short['n'] == 3
+    assert short[['L-CV', 'L-skewness', 'L-kurtosis', 'Discordancy']].isna().all()
+    np.testing.assert_allclose(short[['Q%g' %Ti for Ti in T]].to_numpy(dtype=np.float64), 120. * reg['Growth curve'].to_numpy())
@@ -0,0 +1,97 @@
+# -*- coding: utf-8 -*-
+
+#-Authorship information-########################################################################################################################
+__author__ = 'Wilco Terink'
+__copyright__ = 'Wilco Terink'
+__version__ = '1.0.1'
+__email__ = 'wilco.terink@ecan.govt.nz'
+__date__ ='December 2019'
+#################################################################################################################################################
+
+#-Golden-output and performance regression tests of sepBaseflow, filterpeaks, maxFlowVolStats and fitGEV. The outputs are compared column by
+#-column with the golden outputs in the 'golden' folder (see generate_golden.py). The output of sepBaseflowBatch is compared with the golden
+#-outputs and with the output of sepBaseflow for each site. The performance tests compare the throughput (records per
+#-second) with the baseline timings in golden/timings.json, and fail if the throughput is more than HYDROGRAPH_PERF_FACTOR (default 2) times
+#-lower. Set HYDROGRAPH_SKIP_PERF=1 to skip the performance tests, e.g. on a machine for which no baseline timings have been recorded.
+#
+#   python -m pytest Hydrograph/test/test_regression.py
+
+import json
+import os
+
+import pandas as pd
+import numpy as np
+import pytest
+
+from regression_cases import (TIMINGS_FILE, SEPARATION_CASES, BATCH_CASES, DATE_COLUMNS, runSeparation, runBatch, runFilterpeaks, runStats,
+                              runGEV, annualMaxima, readGolden, bestTime, perfRuns)
+
+#-Relative and absolute tolerance of the comparison of floats. The GEV parameters are fitted by an optimizer and get a larger tolerance.
+RTOL = 1e-9
+ATOL = 1e-9
+RTOL_GEV = 1e-5
+
+PERF_FACTOR = float(os.environ.get('HYDROGRAPH_PERF_FACTOR', 2.))
+SKIP_PERF = os.environ.get('HYDROGRAPH_SKIP_PERF', '0') not in ['', '0']
+
+def assertFrameClose(df, golden, rtol=RTOL, atol=ATOL):
+    '''
+    Compares dataframe df column by column with the golden output. Timestamps must be equal, floats must be equal within the tolerance and
+    missing values must be at the same records. Float32 columns (compact output) are compared at float32 precision.
+    '''
+    assert list(df.columns) == list(golden.columns)
+    assert len(df) == len(golden)
+    if isinstance(golden.index, pd.DatetimeIndex):
+        assert (df.index.values == golden.index.values).all()
+    for c in golden.columns:
+        if c in DATE_COLUMNS:
+            a = pd.to_datetime(df[c]).to_numpy(dtype='M8[ns]')
+            b = golden[c].to_numpy(dtype='M8[ns]')
+            assert (np.isnat(a) == np.isnat(b)).all(), 'missing values of column "%s" differ' %c
+            assert (a[~np.isnat(a)] == b[~np.isnat(b)]).all(), 'column "%s" differs' %c
+        else:
+            a = df[c].to_numpy(dtype=np.float64, na_value=np.nan)
+            b = golden[c].to_numpy(dtype=np.float64, na_value=np.nan)
+            if df[c].dtype == np.float32:
+                b = b.astype(np.float32).astype(np.float64)
+            np.testing.assert_allclose(a, b, rtol=rtol, atol=atol, equal_nan=True, err_msg='column "%s" differs' %c)
+
+@pytest.mark.parametrize('case', list(SEPARATION_CASES))
+def test_sepBaseflow(case):
+    assertFrameClose(runSeparation(case), readGolden(case + '_peaks'))
+
+@pytest.mark.parametrize('case', BATCH_CASES)
+def test_sepBaseflowBatch(case):
+    #-sepBaseflowBatch multiplies k, A and dt in a different order than sepBaseflow, so the results agree within rounding
+    batch, site = runBatch(case)
+    assertFrameClose(batch.xs(case, level='Site'), readGolden(case + '_peaks'))
+    assertFrameClose(batch.xs(case + '_small', level='Site'), site)
+
+def test_filterpeaks():
+    assertFrameClose(runFilterpeaks(), readGolden('filterpeaks'))
+
+def test_maxFlowVolStats():
+    df = runStats(readGolden('multi_year_peaks')).reset_index(drop=True)
+    assertFrameClose(df, readGolden('multi_year_stats', index=False))
+
+def test_fitGEV():
+    x = readGolden('annual_maxima', index=False)['Total runoff interp. [m^3 s^-1]']
+    np.testing.assert_array_equal(x.to_numpy(), annualMaxima().to_numpy())
+    assertFrameClose(runGEV(x), readGolden('annual_maxima_gev', index=False), rtol=RTOL_GEV)
+
+def baseline():
+    if not os.path.exists(TIMINGS_FILE):
+        return {}
+    with open(TIMINGS_FILE) as f:
+        return json.load(f)['runs']
+
+@pytest.mark.skipif(SKIP_PERF, reason='HYDROGRAPH_SKIP_PERF is set')
+@pytest.mark.parametrize('name', ['sepBaseflow', 'filterpeaks', 'maxFlowVolStats', 'fitGEV'])
+def test_performance(name):
+    runs = baseline()
+    if name not in runs:
+        pytest.skip('no baseline timing for %s (run generate_golden.py --timings-only)' %name)
+    f, n = perfRuns()[name]
+    rate = n / bestTime(f)
+    base = runs[name]['records per second']
+    assert rate * PERF_FACTOR >= base, '%s: %.0f records/s, baseline %.0f records/s (factor %g)' %(name, rate, base, PERF_FACTOR)
@@ -21,7 +21,7 @@ descrip = 'Hydrological python package for hydrograph analysis'
 if os.environ.get('READTHEDOCS', False) == 'False':
     INSTALL_REQUIRES = []
 else:
-    INSTALL_REQUIRES = ['numpy', 'pandas', 'scipy', 'matplotlib']
+    INSTALL_REQUIRES = ['numpy>=1.17', 'pandas>=1.0', 'scipy', 'matplotlib']
 
 # Get the long description from the README file
 with open(os.path.join(here, 'README.rst'), encoding='utf-8') as f:
@@ -121,7 +121,10 @@ setup(
         # Specify the Python versions you support here. In particular, ensure
         # that you indicate whether you support Python 2, Python 3 or both.
 
-        'Programming Language :: Python :: 3.6',
+        'Programming Language :: Python :: 3.8',
+        'Programming Language :: Python :: 3.9',
+        'Programming Language :: Python :: 3.10',
+        'Programming Language :: Python :: 3.11',
 
     ],
 
@@ -187,11 +190,11 @@ setup(
     #
     # For example, the following would provide a command called `sample` which
     # executes the function `main` from this package when invoked:
-    # entry_points={  # Optional
-    #    'console_scripts': [
-    #        'sample=sample.command_line:t3',
-    #    ],
-    # },
+    entry_points={  # Optional
+       'console_scripts': [
+           'hydrograph=Hydrograph.cli:main',
+       ],
+    },
     license='GPL-3.0',
-    python_requires=">=3.6",
+    python_requires=">=3.8",
 )